@@ -3,7 +3,11 @@ Kubernetes cluster api helper functions
 """
 
 
+import math
+import os
+import threading
 import time
+from urllib.parse import urlsplit
 
 from kubernetes import client, config
 from kubernetes.client import Configuration
@@ -28,6 +32,97 @@ class K8sClient():
         self._logger = logging.getLogger(__name__)
         config.load_kube_config(settings.getValue('K8S_CONFIG_FILEPATH'))
         self.api = client.CoreV1Api()
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+        self._instrument(self.api.api_client)
+
+    def _instrument(self, api_client):
+        """
+        Wraps requests of ``api_client`` to account them per verb and resource
+        """
+        request = api_client.request
+
+        def timed_request(method, url, *args, **kwargs):
+            key = f'{method} {request_resource(url)}'
+            start = time.monotonic()
+            response = None
+            try:
+                response = request(method, url, *args, **kwargs)
+                return response
+            finally:
+                # only preloaded responses, streamed bodies are not read here
+                size = 0
+                if hasattr(response, 'urllib3_response'):
+                    size = len(response.data or b'')
+                with self._stats_lock:
+                    entry = self._stats.setdefault(key, {'latencies': [], 'bytes': 0,
+                                                         'errors': 0})
+                    entry['latencies'].append(time.monotonic() - start)
+                    entry['bytes'] += size
+                    entry['errors'] += int(response is None)
+
+        api_client.request = timed_request
+
+    def api_stats(self):
+        """
+        Returns API requests made by this client,
+        {'<method> <resource>': {count, errors, bytes, seconds, p50, p90, p99}}
+        """
+        with self._stats_lock:
+            stats = {key: dict(entry, latencies=sorted(entry['latencies']))
+                     for key, entry in self._stats.items()}
+        summary = {}
+        for key, entry in stats.items():
+            latencies = entry['latencies']
+            summary[key] = {'count': len(latencies),
+                            'errors': entry['errors'],
+                            'bytes': entry['bytes'],
+                            'seconds': sum(latencies)}
+            for percent in (50, 90, 99):
+                rank = max(1, math.ceil(percent / 100 * len(latencies)))
+                summary[key][f'p{percent}'] = latencies[rank - 1]
+        return summary
+
+    def log_api_stats(self):
+        """
+        Logs API requests made by this client
+        """
+        for key, entry in sorted(self.api_stats().items()):
+            self._logger.info(f'{key}: {entry}')
+
+    def write_api_stats(self, filename):
+        """
+        Writes API requests made by this client to ``filename`` in
+        Prometheus text format, e.g. for the node exporter's textfile collector
+        """
+        stats = sorted(self.api_stats().items())
+        metrics = (('requests_total', 'counter', 'Kubernetes API requests made', 'count'),
+                   ('errors_total', 'counter', 'Kubernetes API requests failed', 'errors'),
+                   ('response_bytes_total', 'counter', 'Kubernetes API response bytes', 'bytes'))
+        lines = []
+        for name, kind, description, field in metrics:
+            lines += [f'# HELP nfvsec_kube_api_{name} {description}',
+                      f'# TYPE nfvsec_kube_api_{name} {kind}']
+            for key, entry in stats:
+                lines.append(f'nfvsec_kube_api_{name}{{{prometheus_labels(key)}}} {entry[field]}')
+
+        lines += ['# HELP nfvsec_kube_api_request_duration_seconds Kubernetes API latency',
+                  '# TYPE nfvsec_kube_api_request_duration_seconds summary']
+        for key, entry in stats:
+            labels = prometheus_labels(key)
+            for percent in (50, 90, 99):
+                lines.append(f'nfvsec_kube_api_request_duration_seconds'
+                             f'{{{labels},quantile="{percent / 100}"}} {entry[f"p{percent}"]}')
+            lines.append(f'nfvsec_kube_api_request_duration_seconds_sum{{{labels}}} '
+                         f'{entry["seconds"]}')
+            lines.append(f'nfvsec_kube_api_request_duration_seconds_count{{{labels}}} '
+                         f'{entry["count"]}')
+
+        # write and rename, so collectors never read a partial file
+        tmp_name = f'{filename}.tmp'
+        with open(tmp_name, 'w') as fhandle:
+            fhandle.write('\n'.join(lines) + '\n')
+        os.replace(tmp_name, filename)
 
     def get_pod(self, namespace, name):
         """
@@ -56,3 +151,30 @@ class K8sClient():
                         pod.metadata.name, pod.metadata.namespace, command=cmd,
                         stderr=True, stdin=False, stdout=True, tty=False)
         return response
+
+
+def request_resource(url):
+    """
+    Returns resource part of an API request url, names of namespaces and
+    objects are left out, e.g. .../namespaces/default/pods/x/exec -> pods/exec
+    """
+    segments = [segment for segment in urlsplit(url).path.split('/') if segment]
+    if segments[:1] == ['api']:
+        segments = segments[2:]
+    elif segments[:1] == ['apis']:
+        segments = segments[3:]
+    if segments[:1] == ['namespaces'] and len(segments) > 2:
+        segments = segments[2:]
+    if not segments:
+        return 'other'
+    if len(segments) > 2:
+        return f'{segments[0]}/{segments[2]}'
+    return segments[0]
+
+
+def prometheus_labels(key):
+    """
+    Returns Prometheus labels of an ``api_stats`` key '<method> <resource>'
+    """
+    verb, resource = key.split(' ', 1)
+    return f'verb="{verb}",resource="{resource}"'
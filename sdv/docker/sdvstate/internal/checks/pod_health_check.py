@@ -17,8 +17,32 @@
 Pod Health Checks
 """
 
+import json
+import tempfile
+import threading
 
+from kubernetes.client import ApiClient
+from kubernetes.client.rest import ApiException
+
+from tools.conf import settings
 from tools.result_api import rfile
+from tools.kube_utils import list_namespaced_pods, fan_out
+
+from .records import PodRecord
+
+
+LOG_CHUNK_SIZE = 64 * 1024
+
+# only used to turn api objects into plain dicts, never sends requests
+_SERIALIZER = ApiClient()
+
+
+# verdicts of previous runs, {pod uid: (resourceVersion, fields)}, only the
+# verdict fields criteria, name, namespace and node of the PodRecord are
+# kept, details and logs are collected again every run
+_VERDICTS = {}
+_VERDICTS_LOCK = threading.Lock()
+VERDICT_FIELDS = ('criteria', 'name', 'namespace', 'node')
 
 
 def pod_health_check(logger, kube_api, namespace_list_to_check):
@@ -32,15 +56,55 @@ def pod_health_check(logger, kube_api, namespace_list_to_check):
               'details': []
              }
 
+    seen = set()
+    fresh = []
+    failed = []
     for namespace in namespace_list_to_check:
-        pod_list = kube_api.list_namespaced_pod(namespace)
-        for pod in pod_list.items:
-            pod_stats = pod_status(logger, pod)
+        for pod in list_namespaced_pods(namespace):
+            seen.add(pod.metadata.uid)
+            pod_stats = cached_verdict(pod)
+            if pod_stats is None:
+                pod_stats = pod_status(logger, pod)
+                fresh.append((pod, pod_stats))
             if pod_stats['criteria'] == 'fail':
-                pod_stats['logs'] = get_logs(kube_api, pod)
                 result['criteria'] = 'fail'
+                failed.append((pod, pod_stats))
             result['details'].append(pod_stats)
 
+    # logs of failing pods change even if the pods don't
+    collect_logs(kube_api, failed)
+
+    with _VERDICTS_LOCK:
+        for pod, pod_stats in fresh:
+            _VERDICTS[pod.metadata.uid] = (pod.metadata.resource_version,
+                                           {field: pod_stats[field] for field in VERDICT_FIELDS})
+
+        # forget pods that no longer exist
+        for uid in [uid for uid, verdict in _VERDICTS.items()
+                    if verdict[1]['namespace'] in namespace_list_to_check and uid not in seen]:
+            del _VERDICTS[uid]
+
+    return result
+
+
+
+def cached_verdict(pod):
+    """
+    Returns health of ``pod`` from the previous run, None if not known
+
+    Verdict is reused as long as the pod's resourceVersion does not change,
+    so repeated validations in a long-lived process only evaluate pods
+    which changed since the previous run.
+    """
+    with _VERDICTS_LOCK:
+        verdict = _VERDICTS.get(pod.metadata.uid)
+    if verdict is None or verdict[0] != pod.metadata.resource_version:
+        return None
+
+    result = PodRecord(**verdict[1])
+    if result['criteria'] == 'fail':
+        # serialized only if a storage saves it
+        result['pod_details'] = rfile(lambda: pod_details(pod))
     return result
 
 
@@ -49,14 +113,10 @@ def pod_status(logger, pod):
     """
     Check health of a pod and returns it's status as result
     """
-    result = {'criteria': 'pass',
-              'name': pod.metadata.name,
-              'namespace': pod.metadata.namespace,
-              'node': pod.spec.node_name}
+    result = PodRecord.from_pod(pod)
 
     if pod.status.container_statuses is None:
         result['criteria'] = 'fail'
-        result['pod_details'] = rfile(str(pod))
     else:
         for container in pod.status.container_statuses:
             if container.state.running is not None:
@@ -68,7 +128,10 @@ def pod_status(logger, pod):
 
             if status not in ('Running', 'Completed'):
                 result['criteria'] = 'fail'
-                result['pod_details'] = rfile(str(pod))
+
+    if result['criteria'] == 'fail':
+        # serialized only if a storage saves it
+        result['pod_details'] = rfile(lambda: pod_details(pod))
 
     info = f'[Health: {result["criteria"]}] Name: {result["name"]}, '
     info = info + f'Namespace: {result["namespace"]}, Node: {result["node"]}'
@@ -77,9 +140,41 @@ def pod_status(logger, pod):
     return result
 
 
+def pod_details(pod):
+    """
+    Returns compact JSON representation of ``pod``
+
+    managedFields and the last applied configuration are left out, they
+    repeat the spec and are of no use for finding why a pod failed.
+    """
+    data = _SERIALIZER.sanitize_for_serialization(pod)
+    metadata = data.get('metadata', {})
+    metadata.pop('managedFields', None)
+    annotations = metadata.get('annotations') or {}
+    annotations.pop('kubectl.kubernetes.io/last-applied-configuration', None)
+    return json.dumps(data, sort_keys=True)
+
+
+def collect_logs(kube_api, failed):
+    """
+    Collects logs of failed pods concurrently
+
+    :param failed: list of (pod, pod_stats), logs are added to pod_stats
+    """
+    def pod_logs(item):
+        return get_logs(kube_api, item[0])
+
+    for (_, pod_stats), logs in zip(failed, fan_out(pod_logs, failed)):
+        pod_stats['logs'] = logs
+
+
 def get_logs(kube_api, pod):
     """
     Collects logs of all containers in ``pod``
+
+    Only the last ``pod_log_tail_lines`` lines and at most
+    ``pod_log_limit_bytes`` of each log are fetched. For restarted
+    containers the log of the previous instance is collected too.
     """
     logs = []
     if pod.status.container_statuses is not None:
@@ -89,9 +184,45 @@ def get_logs(kube_api, pod):
                container.state.waiting.reason == 'PodInitializing':
                 log = 'Not found, status: waiting, reason: PodInitializing'
             else:
-                log = kube_api.read_namespaced_pod_log(name=pod.metadata.name,
-                                                       namespace=pod.metadata.namespace,
-                                                       container=container.name)
+                log = read_log(kube_api, pod, container.name)
             con['log'] = rfile(log)
+
+            if container.restart_count and settings.getValue('pod_log_previous'):
+                con['previous_log'] = rfile(read_log(kube_api, pod, container.name,
+                                                     previous=True))
             logs.append(con)
     return logs
+
+
+def read_log(kube_api, pod, container, previous=False):
+    """
+    Streams log of ``container`` into a spooled temporary file
+
+    Logs up to ``pod_log_spool_size`` bytes stay in memory, larger ones
+    are spilled to disk.
+
+    :return: file object positioned at start of log, or error message
+    """
+    tail_lines = settings.getValue('pod_log_tail_lines') or None
+    limit_bytes = settings.getValue('pod_log_limit_bytes') or None
+    try:
+        response = kube_api.read_namespaced_pod_log(name=pod.metadata.name,
+                                                    namespace=pod.metadata.namespace,
+                                                    container=container,
+                                                    previous=previous,
+                                                    tail_lines=tail_lines,
+                                                    limit_bytes=limit_bytes,
+                                                    _preload_content=False)
+    except ApiException as error:
+        return f'Not found, reason: {error.reason}'
+
+    # returned to the caller, it lives as long as the rfile holding it
+    log = tempfile.SpooledTemporaryFile(  # pylint: disable=consider-using-with
+        max_size=settings.getValue('pod_log_spool_size'))
+    try:
+        for chunk in response.stream(LOG_CHUNK_SIZE):
+            log.write(chunk)
+    finally:
+        response.release_conn()
+    log.seek(0)
+    return log
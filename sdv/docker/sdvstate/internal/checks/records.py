@@ -0,0 +1,50 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Result records of per pod checks
+"""
+
+from tools.result_api import Record
+
+
+class PodRecord(Record):
+    """
+    Result of a check for one pod
+    """
+    __slots__ = ('criteria', 'name', 'namespace', 'node',
+                 'pod_details', 'logs', 'containers')
+    _optional = ('pod_details', 'logs', 'containers')
+
+    @classmethod
+    def from_pod(cls, pod, criteria='pass'):
+        """
+        Returns record for ``pod``
+        """
+        return cls(criteria=criteria,
+                   name=pod.metadata.name,
+                   namespace=pod.metadata.namespace,
+                   node=pod.spec.node_name)
+
+
+class ContainerRecord(Record):
+    """
+    Result of a check for one container
+    """
+    __slots__ = ('name', 'readiness_probe', 'liveness_probe', 'startup_probe',
+                 'resources')
+    _optional = ('readiness_probe', 'liveness_probe', 'startup_probe',
+                 'resources')
@@ -52,6 +52,28 @@ def display_report(report):
     for case_name in report['details']['fail']:
         logger.info(f'  {case_name}')
     logger.info('')
+    display_check_metrics(logger, report['details'].get('metadata', {}).get('checks', {}))
     logger.info('========================================')
     logger.info('')
     logger.info('')
+
+
+
+def display_check_metrics(logger, checks):
+    """
+    Logs table of per check metrics, slowest check first
+    """
+    if not checks:
+        return
+    logger.info('')
+    logger.info('  CHECK TIMINGS:')
+    logger.info('  =============')
+    logger.info(f'  {"check":<40} {"seconds":>8} {"api":>6} {"exec":>6} {"bytes":>10} {"retries":>7}')
+    for name, metrics in sorted(checks.items(),
+                                key=lambda item: item[1]['duration'] or 0,
+                                reverse=True):
+        if metrics.get('reused'):
+            name += ' (reused)'
+        logger.info(f'  {name:<40} {metrics["duration"] or 0:>8.2f} {metrics["api_calls"]:>6} '
+                    f'{metrics["exec_calls"]:>6} {metrics["bytes"]:>10} {metrics["retries"]:>7}')
+    logger.info('')
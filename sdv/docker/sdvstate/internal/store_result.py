@@ -16,11 +16,17 @@
 store_result function to log and store result
 """
 
+import time
+
 from tools.result_api import result_api
+from tools.kube_utils import metrics
 
 def store_result(logger, result):
     """
-    Logs and stores result
+    Logs and stores result, time the check is blocked on the result store
+    is counted to its metrics
     """
     logger.info(f'[State: {result["criteria"]}] {result["case_name"]}')
+    start = time.monotonic()
     result_api.store(result)
+    metrics.count(store_calls=1, store_seconds=time.monotonic() - start)
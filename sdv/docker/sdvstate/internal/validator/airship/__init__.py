@@ -25,6 +25,8 @@ from .pod_health_check import pod_health_check
 from .probe_check import readiness_probe_check
 from .probe_check import liveness_probe_check
 from .probe_check import startup_probe_check
+from .probe_check import resource_limits_check
+from .probe_check import probe_checks
 
 ### Ceph Health Checks
 from .ceph_check import ceph_health_check
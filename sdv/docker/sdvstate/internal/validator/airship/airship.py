@@ -21,8 +21,11 @@ import logging
 from datetime import datetime as dt
 
 from tools.conf import settings
-from tools.kube_utils import load_kube_api, delete_kube_curl_pod
+from tools.kube_utils import load_kube_api, release_kube_curl_pod, snapshot_stats
+from tools.kube_utils import export_api_stats, save_kube_recording
+from tools.kube_utils import close_exec_sessions, remote_cache_stats
 from internal.validator.validator import Validator
+from internal.validator.incremental import listed_namespaces, labels, pdf_section, setting
 from internal import store_result
 
 from . import *
@@ -68,47 +71,80 @@ class AirshipValidator(Validator):
             self._report['case_name'] = 'ook_airship'
             self.default_suite()
 
-        delete_kube_curl_pod()
+        close_exec_sessions()
+        release_kube_curl_pod()
+        save_kube_recording()
 
+        self._report['details']['metadata']['snapshot'] = snapshot_stats()
+        self._report['details']['metadata']['api'] = export_api_stats()
+        self._report['details']['metadata']['remote_cache'] = remote_cache_stats()
         self._report['stop_date'] = dt.now().strftime('%Y-%m-%d %H:%M:%S')
 
 
+    # inputs of checks whose verdict only changes with them, with
+    # ``incremental_validation`` such checks are skipped while their
+    # inputs don't change. Checks of live state, e.g. ceph health or
+    # monitoring endpoints, always run. So do checks of ovs other_config,
+    # it is live ovsdb state which changes without the pods changing.
+    COMPUTE_INPUTS = (labels('application=nova,component=compute'),
+                      setting('WORKER_ROLE_NAME'),
+                      setting('compute_check_fan_out'),
+                      pdf_section('roles'),
+                      pdf_section('platform_profiles'),
+                      pdf_section('hardware_profiles'),
+                      pdf_section('processor_profiles'),
+                      pdf_section('vim_functional'))
+
+    NETWORK_INPUTS = (labels('application=neutron,component=neutron-ovs-agent'),
+                      labels('application=neutron,component=neutron-sriov-agent'),
+                      pdf_section('physical_networks'))
+
+
     def default_suite(self):
         """
         Default Test Suite
         """
 
         # PLATFORM CHECKS
-        self.update_report(pod_health_check())
-        self.update_report(readiness_probe_check())
-        self.update_report(liveness_probe_check())
-        self.update_report(startup_probe_check())
+        self.add_check(pod_health_check, inputs=[listed_namespaces('airship_namespace_list')])
+        # readiness, liveness and startup probe checks in one pass
+        self.add_check(probe_checks, inputs=[listed_namespaces('airship_namespace_list')])
 
         # STORAGE CHECKS
-        self.update_report(ceph_health_check())
+        self.add_check(ceph_health_check)
 
         # MONITORING & LOGGING AGENTS CHECKS
-        self.update_report(prometheus_check())
-        self.update_report(grafana_check())
+        self.add_check(prometheus_check)
+        self.add_check(grafana_check)
         ## current version of AlertManager doesn't support this
         # prometheus_alert_manager_check()
-        self.update_report(elasticsearch_check())
-        self.update_report(kibana_check())
-        self.update_report(nagios_check())
-        self.update_report(elasticsearch_exporter_check())
-        self.update_report(fluentd_exporter_check())
+        self.add_check(elasticsearch_check)
+        self.add_check(kibana_check)
+        self.add_check(nagios_check)
+        self.add_check(elasticsearch_exporter_check)
+        self.add_check(fluentd_exporter_check)
 
         # NETWORK CHECKS
-        self.update_report(physical_network_check())
+        self.add_check(physical_network_check, inputs=self.NETWORK_INPUTS)
 
         # COMPUTE CHECKS
-        self.update_report(reserved_vnf_cores_check())
-        self.update_report(isolated_cores_check())
-        self.update_report(vswitch_pmd_cores_check())
-        self.update_report(vswitch_dpdk_lcores_check())
-        self.update_report(os_reserved_cores_check())
-        self.update_report(nova_scheduler_filters_check())
-        self.update_report(cpu_allocation_ratio_check())
+        # checks reading nova.conf or ovsdb wait for the first one to read it
+        self.add_check(reserved_vnf_cores_check, inputs=self.COMPUTE_INPUTS)
+        self.add_check(isolated_cores_check, inputs=self.COMPUTE_INPUTS)
+        self.add_check(vswitch_pmd_cores_check)
+        self.add_check(vswitch_dpdk_lcores_check,
+                       depends_on=[vswitch_pmd_cores_check])
+        self.add_check(os_reserved_cores_check,
+                       depends_on=[reserved_vnf_cores_check,
+                                   vswitch_pmd_cores_check])
+        self.add_check(nova_scheduler_filters_check,
+                       depends_on=[reserved_vnf_cores_check],
+                       inputs=self.COMPUTE_INPUTS)
+        self.add_check(cpu_allocation_ratio_check,
+                       depends_on=[reserved_vnf_cores_check],
+                       inputs=self.COMPUTE_INPUTS)
+
+        self.run_checks()
 
 
     def get_report(self):
@@ -18,10 +18,12 @@ Compute Related Checks
 
 import configparser
 import json
+import operator
 import re
 import logging
 
-from tools.kube_utils import kube_exec, get_pod_with_labels
+from tools.kube_utils import get_pod_with_labels, get_pods_with_labels, fan_out
+from tools.kube_utils import read_remote, read_remote_file
 from tools.conf import settings
 from internal import store_result
 
@@ -35,21 +37,11 @@ def isolated_cores_check():
     isolated_cores_check
     """
     logger = logging.getLogger(__name__)
-    traced_value = trace_isolated_cores()
-    required_value = required_isolated_cores()
-
-    result = {'category':  'compute',
-              'case_name': 'isolated_cores_check',
-              'details': {'traced_cores': traced_value,
-                          'required_cores': required_value
-                         }
-             }
-
-    if is_ranges_equals(traced_value, required_value):
-        result['criteria'] = 'pass'
-    else:
-        result['criteria'] = 'fail'
-
+    result = compute_check_result('isolated_cores_check',
+                                  trace_isolated_cores,
+                                  required_isolated_cores(),
+                                  is_ranges_equals,
+                                  ('traced_cores', 'required_cores'))
 
     store_result(logger, result)
     return result
@@ -61,21 +53,11 @@ def reserved_vnf_cores_check():
     reserved_vnf_cores_check
     """
     logger = logging.getLogger(__name__)
-    traced_value = trace_reserved_vnf_cores()
-    required_value = required_reserved_vnf_cores()
-
-    result = {'category':  'compute',
-              'case_name': 'reserved_vnf_cores_check',
-              'details': {'traced_cores': traced_value,
-                          'required_cores': required_value
-                         }
-             }
-
-    if is_ranges_equals(traced_value, required_value):
-        result['criteria'] = 'pass'
-    else:
-        result['criteria'] = 'fail'
-
+    result = compute_check_result('reserved_vnf_cores_check',
+                                  trace_reserved_vnf_cores,
+                                  required_reserved_vnf_cores(),
+                                  is_ranges_equals,
+                                  ('traced_cores', 'required_cores'))
 
     store_result(logger, result)
     return result
@@ -87,21 +69,11 @@ def vswitch_pmd_cores_check():
     vswitch_pmd_cores_check
     """
     logger = logging.getLogger(__name__)
-    traced_value = trace_vswitch_pmd_cores()
-    required_value = required_vswitch_pmd_cores()
-
-    result = {'category':  'compute',
-              'case_name': 'vswitch_pmd_cores_check',
-              'details': {'traced_cores': traced_value,
-                          'required_cores': required_value
-                         }
-             }
-
-    if is_ranges_equals(traced_value, required_value):
-        result['criteria'] = 'pass'
-    else:
-        result['criteria'] = 'fail'
-
+    result = compute_check_result('vswitch_pmd_cores_check',
+                                  trace_vswitch_pmd_cores,
+                                  required_vswitch_pmd_cores(),
+                                  is_ranges_equals,
+                                  ('traced_cores', 'required_cores'))
 
     store_result(logger, result)
     return result
@@ -113,21 +85,11 @@ def vswitch_dpdk_lcores_check():
     vswitch_dpdk_lcores_check
     """
     logger = logging.getLogger(__name__)
-    traced_value = trace_vswitch_dpdk_lcores()
-    required_value = required_vswitch_dpdk_lcores()
-
-    result = {'category':  'compute',
-              'case_name': 'vswitch_dpdk_lcores_check',
-              'details': {'traced_cores': traced_value,
-                          'required_cores': required_value
-                         }
-             }
-
-    if is_ranges_equals(traced_value, required_value):
-        result['criteria'] = 'pass'
-    else:
-        result['criteria'] = 'fail'
-
+    result = compute_check_result('vswitch_dpdk_lcores_check',
+                                  trace_vswitch_dpdk_lcores,
+                                  required_vswitch_dpdk_lcores(),
+                                  is_ranges_equals,
+                                  ('traced_cores', 'required_cores'))
 
     store_result(logger, result)
     return result
@@ -139,21 +101,11 @@ def os_reserved_cores_check():
     os_reserved_cores_check
     """
     logger = logging.getLogger(__name__)
-    traced_value = trace_os_reserved_cores()
-    required_value = required_os_reserved_cores()
-
-    result = {'category':  'compute',
-              'case_name': 'os_reserved_cores_check',
-              'details': {'traced_cores': traced_value,
-                          'required_cores': required_value
-                         }
-             }
-
-    if is_ranges_equals(traced_value, required_value):
-        result['criteria'] = 'pass'
-    else:
-        result['criteria'] = 'fail'
-
+    result = compute_check_result('os_reserved_cores_check',
+                                  trace_os_reserved_cores,
+                                  required_os_reserved_cores(),
+                                  is_ranges_equals,
+                                  ('traced_cores', 'required_cores'))
 
     store_result(logger, result)
     return result
@@ -165,20 +117,11 @@ def nova_scheduler_filters_check():
     nova_scheduler_filters_check
     """
     logger = logging.getLogger(__name__)
-    traced_value = trace_nova_scheduler_filters()
-    required_value = required_nova_scheduler_filters()
-
-    result = {'category':  'compute',
-              'case_name': 'nova_scheduler_filters_check',
-              'details': {'traced_filters': traced_value,
-                          'required_filters': required_value
-                         }
-             }
-
-    if are_lists_equal(traced_value, required_value):
-        result['criteria'] = 'pass'
-    else:
-        result['criteria'] = 'fail'
+    result = compute_check_result('nova_scheduler_filters_check',
+                                  trace_nova_scheduler_filters,
+                                  required_nova_scheduler_filters(),
+                                  are_lists_equal,
+                                  ('traced_filters', 'required_filters'))
 
     store_result(logger, result)
     return result
@@ -190,22 +133,69 @@ def cpu_allocation_ratio_check():
     cpu_allocation_ratio_check
     """
     logger = logging.getLogger(__name__)
-    traced_value = trace_cpu_allocation_ratio()
-    required_value = required_cpu_allocation_ratio()
+    result = compute_check_result('cpu_allocation_ratio_check',
+                                  trace_cpu_allocation_ratio,
+                                  required_cpu_allocation_ratio(),
+                                  operator.eq,
+                                  ('traced_ratio', 'required_ratio'))
+
+    store_result(logger, result)
+    return result
+
+
+
+def compute_check_result(case_name, trace, required_value, compare, keys):
+    """
+    Traces value using ``trace`` and compares it with ``required_value``
+
+    By default value is traced from any one compute node. When
+    ``compute_check_fan_out`` is enabled, it is traced from every compute
+    node concurrently and the result holds per node details.
+
+    :param case_name: name of the check
+    :param trace: function(node=None) returning traced value
+    :param required_value: value expected by the PDF
+    :param compare: function(traced, required) returning True if they match
+    :param keys: tuple of (traced_key, required_key) used in details
+    :return: result dict
+    """
+    traced_key, required_key = keys
 
     result = {'category':  'compute',
-              'case_name': 'cpu_allocation_ratio_check',
-              'details': {'traced_ratio': traced_value,
-                          'required_ratio': required_value
-                         }
+              'case_name': case_name,
+              'criteria':  'pass'
              }
 
-    if traced_value == required_value:
-        result['criteria'] = 'pass'
-    else:
+    if not settings.getValue('compute_check_fan_out'):
+        traced_value = trace()
+        result['details'] = {traced_key: traced_value,
+                             required_key: required_value}
+        if not compare(traced_value, required_value):
+            result['criteria'] = 'fail'
+        return result
+
+    def trace_node(node):
+        """
+        Traces value from ``node``
+        """
+        node_result = {'node': node, 'criteria': 'pass'}
+        try:
+            node_result[traced_key] = trace(node=node)
+        except IndexError:
+            node_result[traced_key] = None
+            node_result['criteria'] = 'fail'
+            node_result['details'] = 'required pod not found on node'
+            return node_result
+
+        if not compare(node_result[traced_key], required_value):
+            node_result['criteria'] = 'fail'
+        return node_result
+
+    nodes = fan_out(trace_node, get_compute_nodes())
+
+    result['details'] = {required_key: required_value, 'nodes': nodes}
+    if not nodes or any(node['criteria'] == 'fail' for node in nodes):
         result['criteria'] = 'fail'
-
-    store_result(logger, result)
     return result
 
 
@@ -213,24 +203,21 @@ def cpu_allocation_ratio_check():
 
 
 
-
-
 ###############
 # helper functions
 ###############
 
 
 
-def trace_isolated_cores():
+def trace_isolated_cores(node=None):
     """
     Trace isolated_cores from Airship deployment
 
     :return: value traced from `isolcpus` key in `/proc/cmdline`
     """
-    pod = get_pod_with_labels('application=nova,component=compute')
+    pod = get_pod_with_labels('application=nova,component=compute', cached=True, node=node)
 
-    cmd = ['cat', '/proc/cmdline']
-    proc_cmd = kube_exec(pod, cmd)
+    proc_cmd = read_remote_file(pod, '/proc/cmdline')
 
     for option in proc_cmd.split():
         if 'isolcpus' in option:
@@ -256,7 +243,7 @@ def required_isolated_cores():
 
 
 
-def trace_reserved_vnf_cores():
+def trace_reserved_vnf_cores(node=None):
     """
     Trace vnf_reserved_cores from Airship deployment
 
@@ -264,7 +251,7 @@ def trace_reserved_vnf_cores():
     of actual deployment
     """
     try:
-        config = get_nova_conf()
+        config = get_nova_conf(node)
         vcpu_pin_set = config.get('DEFAULT', 'vcpu_pin_set')
     except (configparser.NoOptionError, configparser.MissingSectionHeaderError):
         vcpu_pin_set = ''
@@ -288,27 +275,14 @@ def required_reserved_vnf_cores():
 
 
 
-def trace_vswitch_pmd_cores():
+def trace_vswitch_pmd_cores(node=None):
     """
     Trace vswitch_pmd_cores from Airship deployment
 
     :return: value traced from `other_config:pmd-cpu-mask` in
     openvswitchdb using ovs-vsctl
     """
-    ovs_pod = get_pod_with_labels('application=openvswitch,component=openvswitch-vswitchd')
-
-    cmd = ['ovs-vsctl', '-t', '5', 'get', 'Open_vSwitch', '.', 'other_config']
-    response = kube_exec(ovs_pod, cmd)
-
-    # convert config str to json str
-    match = re.findall("[a-zA-Z0-9-]+=", response)
-    for key in match:
-        response = response.replace(key, '"' + key[:-1] + '":')
-    match = re.findall(":[a-zA-Z0-9-]+", response)
-    for key in match:
-        response = response.replace(key[1:], '"' + key[1:] + '"')
-
-    config = json.loads(response)
+    config = get_ovs_other_config(node)
 
     if 'pmd-cpu-mask' in config:
         pmd_cores = hex_to_comma_list(config['pmd-cpu-mask'])
@@ -334,27 +308,14 @@ def required_vswitch_pmd_cores():
 
 
 
-def trace_vswitch_dpdk_lcores():
+def trace_vswitch_dpdk_lcores(node=None):
     """
     Trace vswitch_dpdk_lcores from Airship deployment
 
     :return: value traced from `other_config:dpdk-lcore-mask` in
     openvswitchdb using ovs-vsctl
     """
-    ovs_pod = get_pod_with_labels('application=openvswitch,component=openvswitch-vswitchd')
-
-    cmd = ['ovs-vsctl', '-t', '5', 'get', 'Open_vSwitch', '.', 'other_config']
-    response = kube_exec(ovs_pod, cmd)
-
-    # convert config str to json str
-    match = re.findall("[a-zA-Z0-9-]+=", response)
-    for key in match:
-        response = response.replace(key, '"' + key[:-1] + '":')
-    match = re.findall(":[a-zA-Z0-9-]+", response)
-    for key in match:
-        response = response.replace(key[1:], '"' + key[1:] + '"')
-
-    config = json.loads(response)
+    config = get_ovs_other_config(node)
 
     if 'dpdk-lcore-mask' in config:
         pmd_cores = hex_to_comma_list(config['dpdk-lcore-mask'])
@@ -380,7 +341,7 @@ def required_vswitch_dpdk_lcores():
 
 
 
-def trace_os_reserved_cores():
+def trace_os_reserved_cores(node=None):
     """
     Trace os_reserved_cores from Airship deployment
 
@@ -391,9 +352,9 @@ def trace_os_reserved_cores():
     worker_role = settings.getValue('WORKER_ROLE_NAME')
     all_cores = get_cores_by_role(worker_role)
 
-    reserved_vnf_cores = trace_reserved_vnf_cores()
-    vswitch_pmd_cores = trace_vswitch_pmd_cores()
-    vswitch_dpdk_lcores = trace_vswitch_dpdk_lcores()
+    reserved_vnf_cores = trace_reserved_vnf_cores(node)
+    vswitch_pmd_cores = trace_vswitch_pmd_cores(node)
+    vswitch_dpdk_lcores = trace_vswitch_dpdk_lcores(node)
 
     non_os_cores = []
     non_os_cores.extend(convert_range_to_list(reserved_vnf_cores))
@@ -421,7 +382,7 @@ def required_os_reserved_cores():
 
 
 
-def trace_nova_scheduler_filters():
+def trace_nova_scheduler_filters(node=None):
     """
     Trace scheduler_filters from Airship deployment
 
@@ -429,7 +390,7 @@ def trace_nova_scheduler_filters():
     of actual deployment
     """
     try:
-        config = get_nova_conf()
+        config = get_nova_conf(node)
         filters = config.get('filter_scheduler', 'enabled_filters')
     except (configparser.NoOptionError, configparser.MissingSectionHeaderError):
         filters = ''
@@ -457,7 +418,7 @@ def required_nova_scheduler_filters():
 
 
 
-def trace_cpu_allocation_ratio():
+def trace_cpu_allocation_ratio(node=None):
     """
     Trace cpu_allocation_ratio from Airship deployment
 
@@ -465,7 +426,7 @@ def trace_cpu_allocation_ratio():
     of actual deployment
     """
     try:
-        config = get_nova_conf()
+        config = get_nova_conf(node)
         cpu_allocation_ratio = config.get('DEFAULT', 'cpu_allocation_ratio')
     except (configparser.NoOptionError, configparser.MissingSectionHeaderError):
         cpu_allocation_ratio = ''
@@ -569,21 +530,61 @@ def get_cores_by_role(role_name):
 
 
 
-def get_nova_conf():
+def get_compute_nodes():
+    """
+    Returns sorted names of nodes running nova compute
+    """
+    pods = get_pods_with_labels('application=nova,component=compute')
+    return sorted({pod.spec.node_name for pod in pods})
+
+
+def get_nova_conf(node=None):
     """
     Returns parsed nova.conf
+
+    :param node: read from nova compute pod on this node, default any
     """
-    pod = get_pod_with_labels('application=nova,component=compute')
+    pod = get_pod_with_labels('application=nova,component=compute', cached=True, node=node)
+    return read_remote_file(pod, '/etc/nova/nova.conf', parse_config)
 
-    cmd = ['cat', '/etc/nova/nova.conf']
-    response = kube_exec(pod, cmd)
 
+def parse_config(response):
+    """
+    Parses ini style config file content
+    """
     config = configparser.ConfigParser()
     config.read_string(response)
-
     return config
 
 
+def get_ovs_other_config(node=None):
+    """
+    Returns `other_config` map of Open_vSwitch table as dict
+
+    :param node: read from vswitchd pod on this node, default any
+    """
+    ovs_pod = get_pod_with_labels('application=openvswitch,component=openvswitch-vswitchd',
+                                  cached=True, node=node)
+
+    cmd = ['ovs-vsctl', '-t', '5', 'get', 'Open_vSwitch', '.', 'other_config']
+    return read_remote(ovs_pod, cmd, parse_ovsdb_map)
+
+
+def parse_ovsdb_map(response):
+    """
+    Parses ovsdb map e.g. `{dpdk-init="true", pmd-cpu-mask="0x6"}` to dict
+    """
+    # convert config str to json str
+    match = re.findall("[a-zA-Z0-9-]+=", response)
+    for key in match:
+        response = response.replace(key, '"' + key[:-1] + '":')
+    match = re.findall(":[a-zA-Z0-9-]+", response)
+    for key in match:
+        response = response.replace(key[1:], '"' + key[1:] + '"')
+
+    return json.loads(response)
+
+
 ### cpu cores related helper function
 
 def convert_range_to_list(x):
@@ -16,32 +16,55 @@
 Monitoring & Logging Agents Related Checks
 """
 
-import ast
+import json
 import logging
 
-from tools.kube_utils import kube_curl
+from tools.kube_utils import kube_http_probe, http_probes
 from tools.result_api import rfile
 from internal import store_result
 
 
+# {name: (url, user, password, status_only)} of all endpoints checked in
+# this module, checks of ``status_only`` endpoints only need the status code
+ENDPOINTS = {
+    'prometheus_healthy': ('prom-metrics.osh-infra/-/healthy', 'prometheus', 'password123', False),
+    'prometheus_ready': ('prom-metrics.osh-infra/-/ready', 'prometheus', 'password123', False),
+    'grafana': ('grafana-dashboard.osh-infra:3000/api/health', 'grafana', 'password123', True),
+    'alertmanager_healthy': ('alerts-engine.osh-infra:9093/-/healthy', None, None, False),
+    'alertmanager_ready': ('alerts-engine.osh-infra:9093/-/ready', None, None, False),
+    'elasticsearch': ('elasticsearch.osh-infra/_cluster/health', 'elasticsearch', 'password123',
+                      False),
+    'kibana': ('kibana-dash.osh-infra/api/status', 'elasticsearch', 'password123', False),
+    'nagios': ('nagios-metrics.osh-infra', 'nagios', 'password123', True),
+    'elasticsearch_exporter': ('elasticsearch-exporter.osh-infra:9108/metrics', None, None, True),
+    'fluentd_exporter': ('fluentd-exporter.osh-infra:9309/metrics', None, None, True),
+}
+
+
+def probe(name):
+    """
+    Returns HttpResponse of endpoint ``name``
+
+    All ENDPOINTS are requested together with one exec into the curl pod,
+    once per run, and shared by the checks of this module.
+    """
+    responses = http_probes.get(
+        __name__, lambda: dict(zip(ENDPOINTS, kube_http_probe(list(ENDPOINTS.values())))))
+    return responses[name]
+
+
 def prometheus_check():
     """
     Check health of Prometheus
     """
     logger = logging.getLogger(__name__)
-    username = "prometheus"
-    password = "password123"
-    service = "prom-metrics"
-    namespace = "osh-infra"
 
     health = "fail" #default
-    res = kube_curl("-sL", "-m", "3", "-u", f'{username}:{password}', f'{service}.{namespace}/-/healthy')
-    if 'Prometheus is Healthy' in res:
+    if 'Prometheus is Healthy' in probe('prometheus_healthy').body:
         health = "pass"
 
     readiness = "fail" #default
-    res = kube_curl("-sL", "-m", "3", "-u", f'{username}:{password}', f'{service}.{namespace}/-/ready')
-    if 'Prometheus is Ready' in res:
+    if 'Prometheus is Ready' in probe('prometheus_ready').body:
         readiness = "pass"
 
     if health == "pass" and readiness == "pass":
@@ -65,17 +88,9 @@ def grafana_check():
     Check health of Grafana
     """
     logger = logging.getLogger(__name__)
-    username = "grafana"
-    password = "password123"
-    service = "grafana-dashboard"
-    namespace = "osh-infra"
 
     state = "fail" #default
-    res = kube_curl("-sL", "-m", "3", "-w", "%{http_code}",\
-                    "-o", "/dev/null", "-u",  \
-                    f'{username}:{password}', \
-                    f'{service}.{namespace}:3000/api/health')
-    if res == '200':
+    if probe('grafana').status == 200:
         state = "pass"
 
     result = {'category':  'platform',
@@ -92,17 +107,13 @@ def prometheus_alert_manager_check():
     Check health of Alert Manager
     """
     logger = logging.getLogger(__name__)
-    service = "alerts-engine"
-    namespace = "osh-infra"
 
     health = "fail" #default
-    res = kube_curl("-sL", "-m", "3", f'{service}.{namespace}:9093/-/healthy')
-    if 'Prometheus is Healthy' in res:
+    if 'Prometheus is Healthy' in probe('alertmanager_healthy').body:
         health = "pass"
 
     readiness = "fail" #default
-    res = kube_curl("-sL", "-m", "3", f'{service}.{namespace}:9093/-/ready')
-    if 'Prometheus is Ready' in res:
+    if 'Prometheus is Ready' in probe('alertmanager_ready').body:
         readiness = "pass"
 
     if health == "pass" and readiness == "pass":
@@ -126,18 +137,14 @@ def elasticsearch_check():
     Check health of Elasticsearch cluster
     """
     logger = logging.getLogger(__name__)
-    username = "elasticsearch"
-    password = "password123"
-    service = "elasticsearch"
-    namespace = "osh-infra"
 
     state = "fail" #default
-    res = kube_curl("-sL", "-m", "3", "-u", f'{username}:{password}', f'{service}.{namespace}/_cluster/health')
+    res = probe('elasticsearch').body
 
     if res == '':
         res = 'Elasticsearch not reachable'
     else:
-        res = ast.literal_eval(res)
+        res = json.loads(res)
         if res['status'] == 'green':
             state = "pass"
 
@@ -156,18 +163,14 @@ def kibana_check():
     Check health of Kibana
     """
     logger = logging.getLogger(__name__)
-    username = "elasticsearch"
-    password = "password123"
-    service = "kibana-dash"
-    namespace = "osh-infra"
 
     state = "fail" #default
-    res = kube_curl("-sL", "-m", "3", "-u", f'{username}:{password}', f'{service}.{namespace}/api/status')
+    res = probe('kibana').body
 
     if res == '':
         res = 'kibana not reachable'
     else:
-        res = ast.literal_eval(res)
+        res = json.loads(res)
         if res['status']['overall']['state'] == 'green':
             state = "pass"
 
@@ -186,17 +189,9 @@ def nagios_check():
     Check health of Nagios
     """
     logger = logging.getLogger(__name__)
-    username = "nagios"
-    password = "password123"
-    service = "nagios-metrics"
-    namespace = "osh-infra"
 
     state = "fail" #default
-    res = kube_curl("-sL", "-m", "3", "-w", "%{http_code}",\
-                    "-o", "/dev/null", "-u",  \
-                    f'{username}:{password}', \
-                    f'{service}.{namespace}')
-    if res == '200':
+    if probe('nagios').status == 200:
         state = "pass"
 
     result = {'category':  'platform',
@@ -213,12 +208,9 @@ def elasticsearch_exporter_check():
     Check health of Elasticsearch Exporter
     """
     logger = logging.getLogger(__name__)
-    service = "elasticsearch-exporter"
-    namespace = "osh-infra"
 
     state = "fail" #default
-    res = kube_curl("-sL", "-m", "3", "-w", "%{http_code}", "-o", "/dev/null", f'{service}.{namespace}:9108/metrics')
-    if res == '200':
+    if probe('elasticsearch_exporter').status == 200:
         state = "pass"
 
     result = {'category':  'platform',
@@ -235,12 +227,9 @@ def fluentd_exporter_check():
     Check health of Fluentd Exporter
     """
     logger = logging.getLogger(__name__)
-    service = "fluentd-exporter"
-    namespace = "osh-infra"
 
     state = "fail" #default
-    res = kube_curl("-sL", "-m", "3", "-w", "%{http_code}", "-o", "/dev/null", f'{service}.{namespace}:9309/metrics')
-    if res == '200':
+    if probe('fluentd_exporter').status == 200:
         state = "pass"
 
     result = {'category':  'platform',
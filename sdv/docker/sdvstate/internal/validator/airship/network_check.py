@@ -21,7 +21,7 @@ import configparser
 
 from internal import store_result
 from tools.conf import settings
-from tools.kube_utils import kube_exec, get_pod_with_labels
+from tools.kube_utils import get_pod_with_labels, read_remote, read_remote_file
 
 
 def physical_network_check():
@@ -82,8 +82,8 @@ def neutron_ml2_config():
     """
     Returns parsed ml2 config from neutron
     """
-    ovs = get_pod_with_labels("application=neutron,component=neutron-ovs-agent")
-    sriov = get_pod_with_labels("application=neutron,component=neutron-sriov-agent")
+    ovs = get_pod_with_labels("application=neutron,component=neutron-ovs-agent", cached=True)
+    sriov = get_pod_with_labels("application=neutron,component=neutron-sriov-agent", cached=True)
 
     confs = get_neutron_ml2_conf_from_pod(ovs)
     confs.extend(get_neutron_ml2_conf_from_pod(sriov))
@@ -102,13 +102,12 @@ def get_neutron_ml2_conf_from_pod(pod):
     Reads ml2 config from neutron pod
     """
     cmd = ['ls', '/etc/neutron/plugins/ml2/']
-    response = kube_exec(pod, cmd)
+    response = read_remote(pod, cmd)
     files = response.rstrip("\n").split()
 
     response = []
     for filename in files:
-        cmd = ['cat', '/etc/neutron/plugins/ml2/' + filename]
-        conf = kube_exec(pod, cmd)
+        conf = read_remote_file(pod, '/etc/neutron/plugins/ml2/' + filename)
         response.append(conf)
 
     return response
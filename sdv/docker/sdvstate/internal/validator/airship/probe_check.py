@@ -18,127 +18,134 @@ Probe Checks
 1. Readiness
 2. Liveness
 3. Startup
+
+All container level rules are evaluated in a single pass over the pods,
+each rule still reports its own check result.
 """
 import logging
-from tools.kube_utils import kube_api
+from tools.kube_utils import list_namespaced_pods
 from tools.conf import settings
 
-from store_result import store_result
+from internal import store_result
+from internal.checks.records import PodRecord, ContainerRecord
 
 
-def readiness_probe_check():
+# {case name: (ContainerRecord field, function(container) returning
+#  evidence of the rule being met, None if it is not met)}
+CONTAINER_RULES = {}
+
+
+def add_container_rule(case_name, field, evaluate):
     """
-    Checks whether the readiness probe is configured for all overcloud
-    components deployed as pods on undercloud Kubernetes.
+    Registers a container level rule evaluated by ``container_checks``
+
+    :param case_name: case name of check result the rule reports to
+    :param field: ContainerRecord field to keep evidence of failed pods in
+    :param evaluate: function(container) returning evidence or None
+    """
+    CONTAINER_RULES[case_name] = (field, evaluate)
+
+
+def resource_limits(container):
+    """
+    Returns cpu and memory limits of ``container``, None if either is missing
+    """
+    if container.resources is None or not container.resources.limits:
+        return None
+    limits = container.resources.limits
+    if 'cpu' not in limits or 'memory' not in limits:
+        return None
+    return limits
+
+
+# older kubernetes clients lack startup_probe
+add_container_rule('readiness_probe_check', 'readiness_probe',
+                   lambda container: getattr(container, 'readiness_probe', None))
+add_container_rule('liveness_probe_check', 'liveness_probe',
+                   lambda container: getattr(container, 'liveness_probe', None))
+add_container_rule('startup_probe_check', 'startup_probe',
+                   lambda container: getattr(container, 'startup_probe', None))
+# not part of the default suite
+add_container_rule('resource_limits_check', 'resources', resource_limits)
+
+
+def container_checks(case_names):
+    """
+    Evaluates container rules of ``case_names`` on all overcloud pods,
+    walking every pod once
+
+    :param case_names: case names of registered container rules
+    :return: list of results in order of ``case_names``
     """
     logger = logging.getLogger(__name__)
-    api = kube_api()
     namespace_list = settings.getValue('airship_namespace_list')
+    rules = [CONTAINER_RULES[case_name] for case_name in case_names]
 
-    result = {'category':  'platform',
-              'case_name': 'readiness_probe_check',
-              'criteria':  'pass',
-              'details': []
-             }
+    results = [{'category':  'platform',
+                'case_name': case_name,
+                'criteria':  'pass',
+                'details': []
+               } for case_name in case_names]
 
     for namespace in namespace_list:
-        pod_list = api.list_namespaced_pod(namespace)
-        for pod in pod_list.items:
-            pod_stats = {'criteria': 'pass',
-                         'name': pod.metadata.name,
-                         'namespace': pod.metadata.namespace,
-                         'node': pod.spec.node_name,
-                         'containers': []
-                        }
+        for pod in list_namespaced_pods(namespace):
+            pod_stats = [PodRecord.from_pod(pod) for _ in rules]
+            containers = [[] for _ in rules]
 
             for container in pod.spec.containers:
-                container_stats = {'name': container.name,
-                                   'readiness_probe': None}
-                if hasattr(container, 'readiness_probe') and container.readiness_probe is not None:
-                    container_stats['readiness_probe'] = container.readiness_probe
-                else:
-                    result['criteria'] = 'fail'
-                    pod_stats['criteria'] = 'fail'
-                pod_stats['containers'].append(container_stats)
-            result['details'].append(pod_stats)
-
-    store_result(logger, result)
-    return result
+                for index, (field, evaluate) in enumerate(rules):
+                    evidence = evaluate(container)
+                    containers[index].append(ContainerRecord(name=container.name,
+                                                             **{field: evidence}))
+                    if evidence is None:
+                        results[index]['criteria'] = 'fail'
+                        pod_stats[index]['criteria'] = 'fail'
+
+            for index, result in enumerate(results):
+                # evidence is kept only for failed pods
+                if pod_stats[index]['criteria'] == 'fail':
+                    pod_stats[index]['containers'] = containers[index]
+                result['details'].append(pod_stats[index])
+
+    for result in results:
+        store_result(logger, result)
+    return results
+
+
+def probe_checks():
+    """
+    Checks whether readiness, liveness and startup probes are configured
+    for all overcloud components deployed as pods on undercloud Kubernetes.
+    """
+    return container_checks(['readiness_probe_check',
+                             'liveness_probe_check',
+                             'startup_probe_check'])
+
+
+def readiness_probe_check():
+    """
+    Checks whether the readiness probe is configured for all overcloud
+    components deployed as pods on undercloud Kubernetes.
+    """
+    return container_checks(['readiness_probe_check'])[0]
 
 def liveness_probe_check():
     """
     Checks whether the liveness probe is configured for all overcloud
     components deployed as pods on undercloud Kubernetes.
     """
-    logger = logging.getLogger(__name__)
-    api = kube_api()
-    namespace_list = settings.getValue('airship_namespace_list')
-
-    result = {'category':  'platform',
-              'case_name': 'liveness_probe_check',
-              'criteria':  'pass',
-              'details': []
-             }
-
-    for namespace in namespace_list:
-        pod_list = api.list_namespaced_pod(namespace)
-        for pod in pod_list.items:
-            pod_stats = {'criteria': 'pass',
-                         'name': pod.metadata.name,
-                         'namespace': pod.metadata.namespace,
-                         'node': pod.spec.node_name,
-                         'containers': []
-                        }
-
-            for container in pod.spec.containers:
-                container_stats = {'name': container.name,
-                                   'liveness_probe': None}
-                if hasattr(container, 'liveness_probe') and container.liveness_probe is not None:
-                    container_stats['liveness_probe'] = container.liveness_probe
-                else:
-                    result['criteria'] = 'fail'
-                    pod_stats['criteria'] = 'fail'
-                pod_stats['containers'].append(container_stats)
-            result['details'].append(pod_stats)
-
-    store_result(logger, result)
-    return result
+    return container_checks(['liveness_probe_check'])[0]
 
 def startup_probe_check():
     """
     Checks whether the startup probe is configured for all overcloud
     components deployed as pods on undercloud Kubernetes.
     """
-    logger = logging.getLogger(__name__)
-    api = kube_api()
-    namespace_list = settings.getValue('airship_namespace_list')
-
-    result = {'category':  'platform',
-              'case_name': 'startup_probe_check',
-              'criteria':  'pass',
-              'details': []
-             }
-
-    for namespace in namespace_list:
-        pod_list = api.list_namespaced_pod(namespace)
-        for pod in pod_list.items:
-            pod_stats = {'criteria': 'pass',
-                         'name': pod.metadata.name,
-                         'namespace': pod.metadata.namespace,
-                         'node': pod.spec.node_name,
-                         'containers': []
-                        }
+    return container_checks(['startup_probe_check'])[0]
 
-            for container in pod.spec.containers:
-                container_stats = {'name': container.name,
-                                   'startup_probe': None}
-                if hasattr(container, 'startup_probe') and container.startup_probe is not None:
-                    container_stats['startup_probe'] = container.startup_probe
-                else:
-                    result['criteria'] = 'fail'
-                    pod_stats['criteria'] = 'fail'
-                pod_stats['containers'].append(container_stats)
-            result['details'].append(pod_stats)
-
-    store_result(logger, result)
-    return result
+def resource_limits_check():
+    """
+    Checks whether cpu and memory limits are set for all overcloud
+    components deployed as pods on undercloud Kubernetes.
+    """
+    return container_checks(['resource_limits_check'])[0]
@@ -0,0 +1,273 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Incremental re-validation
+
+Checks declare the inputs their verdict depends on, e.g. pods of a
+namespace or a section of the PDF. A check whose inputs, and the code
+of sdvstate, did not change since a previous run is not run again, its verdict from that
+run is reused instead.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from tools.conf import settings
+from tools.kube_utils import list_all_pods, list_namespaced_pods, list_namespaces
+from tools.kube_utils import get_pods_with_labels
+from tools.result_api import Record
+
+
+class CheckInput():
+    """
+    Check Input
+    Something the verdict of a check depends on
+    """
+
+    def __init__(self, name, digest):
+        """
+        Initialisation function
+
+        :param name: description of input, e.g. ``labels:application=nova``
+        :param digest: function returning digest of current state of input
+        """
+        self.name = name
+        self._digest = digest
+
+    def digest(self):
+        """
+        Returns digest of current state of input
+        """
+        return self._digest()
+
+    def __repr__(self):
+        return f'CheckInput({self.name})'
+
+
+def all_pods():
+    """
+    Pods of all namespaces, changes when any pod changes
+    """
+    return CheckInput('pods', lambda: pods_digest(list_all_pods()))
+
+
+def namespace(name):
+    """
+    Pods of namespace ``name``
+    """
+    return CheckInput(f'namespace:{name}', lambda: pods_digest(list_namespaced_pods(name)))
+
+
+def listed_namespaces(setting_name):
+    """
+    Pods of the namespaces listed in setting ``setting_name``, e.g.
+    ``airship_namespace_list``
+    """
+    def digest():
+        names = settings.getValue(setting_name) or []
+        return value_digest([[name, pods_digest(list_namespaced_pods(name))]
+                             for name in names])
+    return CheckInput(f'namespaces:{setting_name}', digest)
+
+
+def labels(selector):
+    """
+    Pods matching label ``selector``
+    """
+    return CheckInput(f'labels:{selector}', lambda: pods_digest(get_pods_with_labels(selector)))
+
+
+def namespaces():
+    """
+    Names of namespaces
+    """
+    return CheckInput('namespaces', lambda: value_digest(
+        sorted(nspace.metadata.name for nspace in list_namespaces())))
+
+
+def pdf_section(*path):
+    """
+    Subtree of the PDF at ``path``, e.g. ``pdf_section('vim_functional')``
+    """
+    def digest():
+        section = settings.getValue('pdf_file')
+        for key in path:
+            section = section.get(key) if isinstance(section, dict) else None
+        return value_digest(section)
+    return CheckInput('pdf:' + '.'.join(path), digest)
+
+
+def setting(name):
+    """
+    Value of setting ``name``, e.g. loaded from the conf-file
+    """
+    return CheckInput(f'setting:{name}', lambda: value_digest(settings.getValue(name)))
+
+
+def pods_digest(pods):
+    """
+    Returns digest of resourceVersions of ``pods``, it changes with any
+    change of spec or status of a pod. Helper pods of sdvstate itself
+    come and go with every run and are left out.
+    """
+    versions = sorted(f'{pod.metadata.namespace}/{pod.metadata.name}@'
+                      f'{pod.metadata.resource_version}' for pod in pods
+                      if not is_helper_pod(pod))
+    return value_digest(versions)
+
+
+def is_helper_pod(pod):
+    """
+    True for curl and probe pods created by sdvstate
+    """
+    pod_labels = pod.metadata.labels or {}
+    return pod_labels.get('application') == 'sdvstate-curl' or 'sdvstate-probe' in pod_labels
+
+
+def value_digest(value):
+    """
+    Returns digest of json serializable ``value``
+    """
+    data = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+# sdvstate directory, checks depend on code of its ``internal`` and
+# ``tools`` packages
+_CODE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@functools.lru_cache(maxsize=None)
+def code_digest():
+    """
+    Returns digest of all python sources of sdvstate, so that any change
+    of a check or of helpers it uses invalidates kept verdicts
+    """
+    digest = hashlib.sha256()
+    for package in ('internal', 'tools'):
+        for root, dirs, files in os.walk(os.path.join(_CODE_ROOT, package)):
+            dirs.sort()
+            for name in sorted(files):
+                if not name.endswith('.py'):
+                    continue
+                filename = os.path.join(root, name)
+                digest.update(os.path.relpath(filename, _CODE_ROOT).encode('utf-8'))
+                with open(filename, 'rb') as handle:
+                    digest.update(handle.read())
+    return digest.hexdigest()
+
+
+def check_key(check):
+    """
+    Returns name under which verdict of ``check`` is kept
+    """
+    return f'{check.__module__}.{check.__name__}'
+
+
+def fingerprint(check, inputs):
+    """
+    Returns fingerprint of sdvstate code, ``check`` and current state of
+    its ``inputs``
+    """
+    digest = hashlib.sha256()
+    digest.update(code_digest().encode('utf-8'))
+    digest.update(check_key(check).encode('utf-8'))
+    for check_input in inputs:
+        digest.update(check_input.name.encode('utf-8'))
+        digest.update(check_input.digest().encode('utf-8'))
+    return digest.hexdigest()
+
+
+class VerdictStore():
+    """
+    Verdict Store
+    Verdicts of checks by fingerprint of their inputs, kept in
+    ``verdicts.json`` of ``results_dir`` across runs
+    """
+
+    def __init__(self, filename=None):
+        """
+        Initialisation function, loads verdicts of previous runs
+
+        :param filename: file to load verdicts from and save them to,
+            defaults to ``verdicts.json`` in ``results_dir``
+        """
+        self._logger = logging.getLogger(__name__)
+        self._filename = filename or os.path.join(settings.getValue('results_dir'),
+                                                  'verdicts.json')
+        self._lock = threading.Lock()
+        self._verdicts = {}
+        try:
+            with open(self._filename, encoding='utf-8') as handle:
+                self._verdicts = json.load(handle)
+        except FileNotFoundError:
+            pass
+        except ValueError as error:
+            self._logger.warning(f'ignoring verdicts in {self._filename}: {error}')
+
+    def get(self, key, check_fingerprint):
+        """
+        Returns results of verdict of ``key`` if it was given for
+        ``check_fingerprint``, otherwise None
+        """
+        with self._lock:
+            verdict = self._verdicts.get(key)
+        if verdict is None or verdict['fingerprint'] != check_fingerprint:
+            return None
+        return verdict['results']
+
+    def put(self, key, check_fingerprint, results):
+        """
+        Keeps ``results`` as verdict of ``key`` for ``check_fingerprint``
+
+        Results which can not be kept as json, e.g. ones holding logs as
+        rfiles, are not kept and the check runs again next time.
+        """
+        try:
+            results = json.loads(json.dumps(results, default=as_json))
+        except (TypeError, ValueError) as error:
+            self._logger.debug(f'verdict of {key} not kept: {error}')
+            with self._lock:
+                self._verdicts.pop(key, None)
+            return
+        with self._lock:
+            self._verdicts[key] = {'fingerprint': check_fingerprint, 'results': results}
+
+    def save(self):
+        """
+        Writes verdicts to file
+        """
+        with self._lock:
+            data = json.dumps(self._verdicts)
+        os.makedirs(os.path.dirname(self._filename) or '.', exist_ok=True)
+        tmp_name = self._filename + '.tmp'
+        with open(tmp_name, 'w', encoding='utf-8') as handle:
+            handle.write(data)
+        os.replace(tmp_name, self._filename)
+
+
+def as_json(obj):
+    """
+    json default for Records, anything else is not kept
+    """
+    if isinstance(obj, Record):
+        return obj.as_dict()
+    raise TypeError(f'{type(obj).__name__} is not kept in verdicts')
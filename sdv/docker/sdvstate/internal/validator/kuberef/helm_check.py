@@ -5,7 +5,7 @@ Checks if the helm v2 is supported in the cluster
 """
 
 import logging
-from tools.kube_utils import kube_api
+from tools.kube_utils import iterate_pods
 from tools.conf import settings
 from  internal.store_result import store_result
 
@@ -18,14 +18,11 @@ def helmv2_disabled_check():
               'criteria':  'pass',
               'details': []
              }
-    kube = kube_api()
     logger = logging.getLogger(__name__)
     res = False
-    pod_details = kube.list_pod_for_all_namespaces()
-    pods = pod_details.items
     version_support = settings.getValue('pdf_file')['vim_functional']['legacy_helm_support']
     if 'YES' in version_support:
-        for pod in pods:
+        for pod in iterate_pods():
             if 'tiller' in pod.metadata.name:
                 res = True
                 result['details'].append(pod)
@@ -22,16 +22,19 @@ from datetime import datetime as dt
 
 from internal import store_result
 from internal.validator.validator import Validator
+from internal.validator.incremental import all_pods, listed_namespaces, namespace, namespaces
+from internal.validator.incremental import pdf_section
 from internal.validator.kuberef.policy_checks import topology_manager_policy_check, cpu_manager_policy_check
-from internal.validator.kuberef.security_check import capability_check, privilege_check, host_network_check
-from internal.validator.kuberef.security_check import host_path_vol_check, k8s_api_conn_check
+from internal.validator.kuberef.security_check import security_checks, k8s_api_conn_check
 from internal.validator.kuberef.monitoring_agent_checker import collectd_check, monitoring_agent_check
 from internal.validator.kuberef.node_exporter_checker import node_exporter_check
 from internal.validator.kuberef.plugin_check import cni_plugin_check, multi_interface_cni_check
 from internal.validator.kuberef.helm_check import helmv2_disabled_check
 from internal.validator.kuberef.kubevirt_health_check import kubevirt_check
 from tools.conf import settings
-from tools.kube_utils import load_kube_api
+from tools.kube_utils import load_kube_api, snapshot_stats, close_exec_sessions
+from tools.kube_utils import export_api_stats
+from tools.kube_utils import release_kube_curl_pod, save_kube_recording
 
 from . import *
 
@@ -80,6 +83,11 @@ class KuberefValidator(Validator):
             self._report['case_name'] = 'default_kuberef'
             self.default_suite()
 
+        close_exec_sessions()
+        release_kube_curl_pod()
+        save_kube_recording()
+        self._report['details']['metadata']['snapshot'] = snapshot_stats()
+        self._report['details']['metadata']['api'] = export_api_stats()
         self._report['stop_date'] = dt.now().strftime('%Y-%m-%d %H:%M:%S')
 
 
@@ -88,30 +96,36 @@ class KuberefValidator(Validator):
         Default Test Suite
         """
 
+        # inputs are declared for checks whose verdict only changes with
+        # them, see ``incremental_validation``. Checks of live state, e.g.
+        # probe pods, API connectivity or kubelet config, always run.
+
         # PLATFORM CHECKS
-        self.update_report(pod_health_check())
-        self.update_report(kubevirt_check())
-        self.update_report(helmv2_disabled_check())
-        self.update_report(capability_check())
-        self.update_report(privilege_check())
-        self.update_report(host_network_check())
-        self.update_report(host_path_vol_check())
-        self.update_report(k8s_api_conn_check())
+        self.add_check(pod_health_check, inputs=[listed_namespaces('kuberef_namespace_list')])
+        self.add_check(kubevirt_check, inputs=[namespaces(), namespace('kubevirt')])
+        self.add_check(helmv2_disabled_check,
+                       inputs=[all_pods(), pdf_section('vim_functional', 'legacy_helm_support')])
+        # capability, privilege, host network and host path checks
+        self.add_check(security_checks)
+        self.add_check(k8s_api_conn_check)
 
 
         # MONITORING & LOGGING AGENT CHECKS
-        self.update_report(monitoring_agent_check())
-        self.update_report(collectd_check())
-        self.update_report(node_exporter_check())
+        self.add_check(monitoring_agent_check, inputs=[namespaces(), all_pods()])
+        self.add_check(collectd_check, inputs=[all_pods()])
+        self.add_check(node_exporter_check, inputs=[namespaces(), all_pods()])
 
         # COMPUTE CHECKS
-        self.update_report(cpu_manager_policy_check())
-        self.update_report(topology_manager_policy_check())
+        self.add_check(cpu_manager_policy_check)
+        self.add_check(topology_manager_policy_check)
 
 
         # NETWORK CHECKS
-        self.update_report(cni_plugin_check())
-        self.update_report(multi_interface_cni_check())
+        # both checks create and delete the same DaemonSet
+        self.add_check(cni_plugin_check)
+        self.add_check(multi_interface_cni_check, depends_on=[cni_plugin_check])
+
+        self.run_checks()
 
 
 
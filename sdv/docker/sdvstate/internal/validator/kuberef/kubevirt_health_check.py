@@ -4,8 +4,8 @@ Checks the existence and health of kubevirt
 """
 
 import logging
-from tools.kube_utils import kube_api
-from internal.checks.pod_health_check import pod_status, get_logs
+from tools.kube_utils import kube_api, list_namespaces, list_namespaced_pods
+from internal.checks.pod_health_check import pod_status, collect_logs
 from  internal.store_result import store_result
 
 def kubevirt_check():
@@ -14,9 +14,8 @@ def kubevirt_check():
 
     """
     k8s_api = kube_api()
-    namespaces = k8s_api.list_namespace()
     ns_names = []
-    for nspace in namespaces.items:
+    for nspace in list_namespaces():
         ns_names.append(nspace.metadata.name)
 
     result = {'category':  'platform',
@@ -30,13 +29,14 @@ def kubevirt_check():
     if 'kubevirt' in ns_names:
         result['criteria'] = 'pass'
         result['details'].append(ns_names)
-        pod_list = k8s_api.list_namespaced_pod('kubevirt')
-        for pod in pod_list.items:
+        failed = []
+        for pod in list_namespaced_pods('kubevirt'):
             pod_stats = pod_status(logger, pod)
             if pod_stats['criteria'] == 'fail':
-                pod_stats['logs'] = get_logs(k8s_api, pod)
+                failed.append((pod, pod_stats))
                 result['criteria'] = 'fail'
             result['details'].append(pod_stats)
+        collect_logs(k8s_api, failed)
     else:
         result['criteria'] = 'fail'
 
@@ -4,19 +4,20 @@ Checks for prometheus and collectd existence and health
 """
 
 import logging
-from tools.kube_utils import kube_api
+from tools.kube_utils import kube_api, list_namespaces, iterate_pods
 from  internal.store_result import store_result
-from internal.checks.pod_health_check import pod_status, get_logs
+from internal.checks.pod_health_check import pod_status, collect_logs
 
-def health_checker(pod, api_instance, logger, result):
+def health_checker(pod, failed, logger, result):
     """
-    Checks the health of pod
+    Checks the health of pod, failed pods are added to ``failed`` for
+    their logs to be collected
     """
     status = []
     pod_stats = pod_status(logger, pod)
 
     if pod_stats['criteria'] == 'fail':
-        pod_stats['logs'] = get_logs(api_instance, pod)
+        failed.append((pod, pod_stats))
         result['criteria'] = 'fail'
 
     status.append(pod.metadata.name)
@@ -28,10 +29,9 @@ def monitoring_agent_check():
     Checks existence & health of prometheus pods
     """
     api_instance = kube_api()
-    namespaces = api_instance.list_namespace()
     ns_names = []
 
-    for nspace in namespaces.items:
+    for nspace in list_namespaces():
         ns_names.append(nspace.metadata.name)
 
     result = {'category':  'observability',
@@ -44,22 +44,17 @@ def monitoring_agent_check():
     flag = False
     logger = logging.getLogger(__name__)
     if 'monitoring' in ns_names:
-        pod_details = api_instance.list_namespaced_pod('monitoring', watch=False)
-        pods = pod_details.items
-        for pod in pods:
-            if 'prometheus' in pod.metadata.name:
-                stats = health_checker(pod, api_instance, logger, result)
-                status.append(stats)
-                flag = True
+        pods = iterate_pods(namespace='monitoring')
     else:
-        for name in ns_names:
-            pod_details = api_instance.list_namespaced_pod(name, watch=False)
-            pods = pod_details.items
-            for pod in pods:
-                if 'prometheus' in pod.metadata.name:
-                    stats = health_checker(pod, api_instance, logger, result)
-                    status.append(stats)
-                    flag = True
+        pods = iterate_pods()
+
+    failed = []
+    for pod in pods:
+        if 'prometheus' in pod.metadata.name:
+            stats = health_checker(pod, failed, logger, result)
+            status.append(stats)
+            flag = True
+    collect_logs(api_instance, failed)
 
     if flag is False:
         result['criteria'] = 'fail'
@@ -74,8 +69,6 @@ def collectd_check():
     Checks for collectd pods present and their state of being
     """
     api_instance = kube_api()
-    pod_details = api_instance.list_pod_for_all_namespaces()
-    pods = pod_details.items
 
     result = {'category':  'observability',
               'case_name': 'collectd_check',
@@ -88,11 +81,13 @@ def collectd_check():
     status = []
 
     flag = False
-    for pod in pods:
+    failed = []
+    for pod in iterate_pods():
         if 'collectd' in pod.metadata.name:
-            stats = health_checker(pod, api_instance, logger, result)
+            stats = health_checker(pod, failed, logger, result)
             status.append(stats)
             flag = True
+    collect_logs(api_instance, failed)
 
     if flag is False:
         result['criteria'] = 'fail'
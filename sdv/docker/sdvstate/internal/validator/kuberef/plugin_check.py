@@ -5,10 +5,9 @@ Multi-interface CNI Check
 #pylint: disable=broad-except
 
 
-import time
 import logging
-from kubernetes import client
-from tools.kube_utils import kube_api, kube_exec
+from kubernetes.client.rest import ApiException
+from tools.kube_utils import kube_api, kube_apps_api, kube_exec, wait_for_daemonset_rollout
 from tools.conf import settings
 from  internal.store_result import store_result
 
@@ -70,14 +69,25 @@ def create_daemonset(apps_instance):
         }
     }
     apps_instance.create_namespaced_daemon_set('default', manifest)
-    time.sleep(6)
+    wait_for_daemonset_rollout('plugin-check-test-set', 'default')
+
+
+def delete_daemonset(apps_instance):
+    """
+    Deletes daemonset of the checks, if it exists
+    """
+    try:
+        apps_instance.delete_namespaced_daemon_set('plugin-check-test-set', 'default')
+    except ApiException as error:
+        if error.status != 404:
+            raise
 
 
 def multi_interface_cni_check():
     """
     Checks if multi interface cni is enabled
     """
-    apps_instance = client.AppsV1Api()
+    apps_instance = kube_apps_api()
     api_instance = kube_api()
     logger = logging.getLogger(__name__)
 
@@ -87,14 +97,14 @@ def multi_interface_cni_check():
               'details': []
              }
 
-    create_daemonset(apps_instance)
-    pod_details = api_instance.list_namespaced_pod('default', watch=False)
-    pods = pod_details.items
     status = []
     cmd = ['ls', '/etc/cni/net.d']
 
-    for pod in pods:
-        if 'plugin-check-test-set' in pod.metadata.name:
+    try:
+        create_daemonset(apps_instance)
+        pods = [pod for pod in api_instance.list_namespaced_pod('default', watch=False).items
+                if 'plugin-check-test-set' in pod.metadata.name]
+        for pod in pods:
             try:
                 list_of_plugin_conf = kube_exec(pod, cmd)
                 list_of_plugin_conf = list_of_plugin_conf.split("\n")
@@ -117,8 +127,13 @@ def multi_interface_cni_check():
             except Exception as error:
                 result['criteria'] = 'fail'
                 status.append(error)
+    except (TimeoutError, RuntimeError) as error:
+        # daemonset did not roll out, errors of pods are handled above
+        result['criteria'] = 'fail'
+        status.append(f'plugin-check-test-set not rolled out: {error}')
+    finally:
+        delete_daemonset(apps_instance)
 
-    apps_instance.delete_namespaced_daemon_set('plugin-check-test-set', 'default')
     result['details'].append(status)
     store_result(logger, result)
     return result
@@ -127,7 +142,7 @@ def cni_plugin_check():
     """
     Checks for CNI plugins and validate against PDF
     """
-    apps_instance = client.AppsV1Api()
+    apps_instance = kube_apps_api()
     api_instance = kube_api()
 
     result = {'category':  'network',
@@ -137,17 +152,16 @@ def cni_plugin_check():
              }
 
     logger = logging.getLogger(__name__)
-    create_daemonset(apps_instance)
-    pod_details = api_instance.list_namespaced_pod('default', watch=False)
-    pods = pod_details.items
     daemon_pods = []
     status = []
     cmd = ['ls', '/opt/cni/bin']
     cni_plugins = settings.getValue('pdf_file')['vim_functional']['cnis_supported']
 
-
-    for pod in pods:
-        if 'plugin-check-test-set' in pod.metadata.name:
+    try:
+        create_daemonset(apps_instance)
+        pods = [pod for pod in api_instance.list_namespaced_pod('default', watch=False).items
+                if 'plugin-check-test-set' in pod.metadata.name]
+        for pod in pods:
             try:
                 list_of_cni_from_dir = kube_exec(pod, cmd)
 
@@ -167,9 +181,12 @@ def cni_plugin_check():
             except Exception as error:
                 result['criteria'] = 'fail'
                 status.append(error)
-
-
-    apps_instance.delete_namespaced_daemon_set('plugin-check-test-set', 'default')
+    except (TimeoutError, RuntimeError) as error:
+        # daemonset did not roll out, errors of pods are handled above
+        result['criteria'] = 'fail'
+        status.append(f'plugin-check-test-set not rolled out: {error}')
+    finally:
+        delete_daemonset(apps_instance)
 
     result['details'].append(daemon_pods)
     result['details'].append(status)
@@ -4,9 +4,8 @@ Checks if the policies are properly configured
 """
 
 
-import ast
 import logging
-from tools.kube_utils import kube_api
+from tools.kube_utils import node_configz
 from tools.conf import settings
 from  internal.store_result import store_result
 
@@ -14,13 +13,8 @@ def cpu_manager_policy_check():
     """
     Checks cpu manager settings
     """
-    api = kube_api()
     logger = logging.getLogger(__name__)
-    node_list = api.list_node()
-    nodes = []
-
-    for node in node_list.items:
-        nodes.append(node.metadata.name)
+    configs = node_configz()
 
     result = {'category':  'compute',
               'case_name': 'cpu_manager_policy_check',
@@ -28,15 +22,21 @@ def cpu_manager_policy_check():
               'details': []
              }
 
-    for node in nodes:
-        configz = api.connect_get_node_proxy_with_path(node, "configz")
-        configz = ast.literal_eval(configz)
+    flag = True
+    for node, configz in configs.items():
         res = {
             'node': node,
             'criteria':  'pass',
             'config': []
         }
 
+        if isinstance(configz, Exception):
+            res['criteria'] = 'fail'
+            res['config'] = [configz]
+            result['criteria'] = 'fail'
+            result['details'].append(res)
+            continue
+
         status = []
 
         flag = True
@@ -73,13 +73,8 @@ def topology_manager_policy_check():
     """
     Checks topology manager settings
     """
-    api = kube_api()
     logger = logging.getLogger(__name__)
-    node_list = api.list_node()
-    nodes = []
-
-    for node in node_list.items:
-        nodes.append(node.metadata.name)
+    configs = node_configz()
 
 
     result = {
@@ -89,15 +84,21 @@ def topology_manager_policy_check():
         'details': []
     }
 
-    for node in nodes:
-        configz = api.connect_get_node_proxy_with_path(node, "configz")
-        configz = ast.literal_eval(configz)
+    flag = True
+    for node, configz in configs.items():
         res = {
             'node': node,
             'criteria':  'pass',
             'config': []
         }
 
+        if isinstance(configz, Exception):
+            res['criteria'] = 'fail'
+            res['config'] = [configz]
+            result['criteria'] = 'fail'
+            result['details'].append(res)
+            continue
+
         status = []
 
         flag = True
@@ -4,257 +4,208 @@ Security Checks
 
 #pylint: disable=broad-except
 
-import time
 import logging
-from tools.kube_utils import kube_api, kube_curl
-from tools.kube_utils import kube_exec
+from tools.kube_utils import kube_curl, kube_exec
+from tools.kube_utils import run_probe_pods, pod_is_scheduled
 from  internal.store_result import store_result
 
-# capability check
-def capability_check():
-    """
-    Checks if creation of pods with particular capabilties is possible
-    """
-    kube = kube_api()
-    logger = logging.getLogger(__name__)
-    pod_manifest = {
-        'apiVersion': 'v1',
-        'kind': 'Pod',
-        'metadata': {
+CAPABILITY_POD = {
+    'apiVersion': 'v1',
+    'kind': 'Pod',
+    'metadata': {
+        'name': 'security-capability-demo',
+    },
+    'spec': {
+        'containers': [{
+            'image': 'alpine:3.2',
             'name': 'security-capability-demo',
-        },
-        'spec': {
-            'containers': [{
-                'image': 'alpine:3.2',
-                'name': 'security-capability-demo',
-                'command': ["/bin/sh", "-c", "sleep 60m"],
-                'securityContext': {
-                    'capabilities': {
-                        'drop': [
-                            "ALL"
-                        ],
-                        'add': [
-                            'NET_ADMIN', 'NET_RAW'
-                        ]
-                    }
+            'command': ["/bin/sh", "-c", "sleep 60m"],
+            'securityContext': {
+                'capabilities': {
+                    'drop': [
+                        "ALL"
+                    ],
+                    'add': [
+                        'NET_ADMIN', 'NET_RAW'
+                    ]
                 }
-            }]
-        }
+            }
+        }]
     }
-    result = {'category':  'platform',
-              'case_name': 'capability_check',
-              'criteria':  'pass',
-              'details': []
-             }
-    status = []
-    try:
-        pod_cap = kube.create_namespaced_pod(body=pod_manifest, namespace='default')
-        time.sleep(6)
-        cmd = ['cat', '/proc/1/status']
-
-        response = kube_exec(pod_cap, cmd)
-        if "0000000000003000" in response:
-            result['criteria'] = 'fail'
-            status.append(pod_cap)
-        kube.delete_namespaced_pod(name=pod_cap.metadata.name, namespace='default')
+}
+
+PRIVILEGE_POD = {
+    'apiVersion': 'v1',
+    'kind': 'Pod',
+    'metadata': {
+        'name': 'security-privileges-demo',
+    },
+    'spec': {
+        'containers': [{
+            'image': 'alpine:3.2',
+            'name': 'security-privileges-demo',
+            'command': ["/bin/sh", "-c", "sleep 60m"],
+            'securityContext': {
+                'privileged': True
+            }
+        }]
+    }
+}
+
+HOST_NETWORK_POD = {
+    'apiVersion': 'v1',
+    'kind': 'Pod',
+    'metadata': {
+        'name': 'security-host-network-demo',
+    },
+    'spec': {
+        'hostNetwork': True,
+        'containers': [{
+            'image': 'k8s.gcr.io/pause',
+            'name': 'security-host-network-demo',
+            'command': ["/bin/sh", "-c", "sleep 60m"],
+        }],
+        'restartPolicy': 'Always'
+    }
+}
+
+HOST_PATH_VOL_POD = {
+    'apiVersion': 'v1',
+    'kind': 'Pod',
+    'metadata': {
+        'name': 'security-host-path-volume-demo',
+    },
+    'spec': {
+        'hostNetwork': True,
+        'containers': [{
+            'image': 'k8s.gcr.io/pause',
+            'name': 'security-host-path-volume-demo',
+            'command': ["/bin/sh", "-c", "sleep 60m"],
+        }],
+        'volumes': [
+            {
+                'name': 'test-vol',
+                'hostpath': {
+                    'path': 'home',
+                    'type': 'Directory'
+                }
+            }
+        ]
+    }
+}
 
-    except KeyError as error:
-        status.append(error)
 
-    except RuntimeError as error:
-        status.append(error)
+def pod_is_running(pod):
+    """
+    True if pod is running, raises RuntimeError if pod failed
+    """
+    if pod.status.phase == 'Failed':
+        raise RuntimeError(f'pod {pod.metadata.name} failed')
+    return pod.status.phase == 'Running'
 
-    except Exception as error:
-        kube.delete_namespaced_pod(name=pod_cap.metadata.name, namespace='default')
-        result['criteria'] = 'fail'
-        status.append(error)
 
+def capability_probe(pod):
+    """
+    Fails if the pod got NET_ADMIN and NET_RAW capabilities
+    """
+    response = kube_exec(pod, ['cat', '/proc/1/status'])
+    if "0000000000003000" in response:
+        return 'fail', [pod]
+    return 'pass', []
 
-    result['details'].append(status)
-    store_result(logger, result)
-    return result
 
-# privileges check
-def privilege_check():
+def privilege_probe(pod):
     """
-    Checks if privileged pods are possible to created
+    Fails if the pod runs privileged processes
     """
-    kube = kube_api()
-    logger = logging.getLogger(__name__)
+    response = kube_exec(pod, ['ps', 'aux'])
+    if "root" in response:
+        return 'fail', [response]
+    return 'pass', []
 
-    pod_manifest = {
-        'apiVersion': 'v1',
-        'kind': 'Pod',
-        'metadata': {
-            'name': 'security-privileges-demo',
-        },
-        'spec': {
-            'containers': [{
-                'image': 'alpine:3.2',
-                'name': 'security-privileges-demo',
-                'command': ["/bin/sh", "-c", "sleep 60m"],
-                'securityContext': {
-                    'privileged': True
-                }
-            }]
-        }
-    }
-    result = {'category':  'platform',
-              'case_name': 'privilege_check',
-              'criteria':  'pass',
-              'details': []
-             }
 
-    status = []
+def admitted_probe(pod):    # pylint: disable=unused-argument
+    """
+    Fails as the pod was admitted and scheduled
+    """
+    return 'fail', []
 
-    try:
-        pod_priv = kube.create_namespaced_pod(body=pod_manifest, namespace='default')
-        time.sleep(5)
-        cmd = ['ps', 'aux']
 
-        response = kube_exec(pod_priv, cmd)
+# case name, probe pod, readiness predicate, assertion
+SECURITY_PROBES = [
+    ('capability_check', CAPABILITY_POD, pod_is_running, capability_probe),
+    ('privilege_check', PRIVILEGE_POD, pod_is_running, privilege_probe),
+    ('host_network_check', HOST_NETWORK_POD, pod_is_scheduled, admitted_probe),
+    ('host_path_dir_vol_check', HOST_PATH_VOL_POD, pod_is_scheduled, admitted_probe),
+]
 
-        if "root" in response:
-            result['criteria'] = 'fail'
-            status.append(response)
 
-        kube.delete_namespaced_pod(name=pod_priv.metadata.name, namespace='default')
+def security_checks(case_names=None):
+    """
+    Runs pod security checks with one batch of probe pods
 
-    except KeyError as error:
-        status.append(error)
+    All probe pods are created together and each assertion runs as soon
+    as its pod is ready, so the checks take about one pod lifecycle.
 
-    except RuntimeError as error:
-        status.append(error)
+    :param case_names: checks to run, default all of ``SECURITY_PROBES``
+    :return: list of results
+    """
+    logger = logging.getLogger(__name__)
+    probes = [probe for probe in SECURITY_PROBES
+              if case_names is None or probe[0] in case_names]
+
+    outcomes = run_probe_pods([(manifest, ready, assertion)
+                               for _, manifest, ready, assertion in probes])
+
+    results = []
+    for (case_name, _, _, _), outcome in zip(probes, outcomes):
+        result = {'category':  'platform',
+                  'case_name': case_name,
+                  'criteria':  'pass',
+                  'details': []
+                 }
+
+        if isinstance(outcome, (KeyError, RuntimeError)):
+            status = [outcome]
+        elif isinstance(outcome, Exception):
+            result['criteria'] = 'fail'
+            status = [outcome]
+        else:
+            result['criteria'], status = outcome
 
-    except Exception as error:
-        kube.delete_namespaced_pod(name=pod_priv.metadata.name, namespace='default')
-        result['criteria'] = 'fail'
-        status.append(error)
+        result['details'].append(status)
+        store_result(logger, result)
+        results.append(result)
 
-    result['details'].append(status)
+    return results
 
-    store_result(logger, result)
-    return result
+# capability check
+def capability_check():
+    """
+    Checks if creation of pods with particular capabilties is possible
+    """
+    return security_checks(['capability_check'])[0]
+
+# privileges check
+def privilege_check():
+    """
+    Checks if privileged pods are possible to created
+    """
+    return security_checks(['privilege_check'])[0]
 
 # host network check
 def host_network_check():
     """
     Checks if the pods can share the network with their host
     """
-    kube = kube_api()
-    logger = logging.getLogger(__name__)
-
-    pod_manifest = {
-        'apiVersion': 'v1',
-        'kind': 'Pod',
-        'metadata': {
-            'name': 'security-host-network-demo',
-        },
-        'spec': {
-            'hostNetwork': True,
-            'containers': [{
-                'image': 'k8s.gcr.io/pause',
-                'name': 'security-host-network-demo',
-                'command': ["/bin/sh", "-c", "sleep 60m"],
-            }],
-            'restartPolicy': 'Always'
-        }
-    }
-    result = {'category':  'platform',
-              'case_name': 'host_network_check',
-              'criteria':  'pass',
-              'details': []
-             }
-
-    status = []
-
-    try:
-        pod_nw = kube.create_namespaced_pod(body=pod_manifest, namespace='default')
-        time.sleep(6)
-
-        kube.delete_namespaced_pod(name=pod_nw.metadata.name, namespace='default')
-        result['criteria'] = 'fail'
-
-    except KeyError as error:
-        status.append(error)
-
-    except RuntimeError as error:
-        status.append(error)
-
-    except Exception as error:
-        kube.delete_namespaced_pod(name=pod_nw.metadata.name, namespace='default')
-        result['criteria'] = 'fail'
-        status.append(error)
-
-
-    result['details'].append(status)
-
-    store_result(logger, result)
-    return result
+    return security_checks(['host_network_check'])[0]
 
 # host directory as a volume check
 def host_path_vol_check():
     """
     Checks if pods can be mounted to a host directory
     """
-    kube = kube_api()
-    logger = logging.getLogger(__name__)
-
-    pod_manifest = {
-        'apiVersion': 'v1',
-        'kind': 'Pod',
-        'metadata': {
-            'name': 'security-host-path-volume-demo',
-        },
-        'spec': {
-            'hostNetwork': True,
-            'containers': [{
-                'image': 'k8s.gcr.io/pause',
-                'name': 'security-host-path-volume-demo',
-                'command': ["/bin/sh", "-c", "sleep 60m"],
-            }],
-            'volumes': [
-                {
-                    'name': 'test-vol',
-                    'hostpath': {
-                        'path': 'home',
-                        'type': 'Directory'
-                    }
-                }
-            ]
-        }
-    }
-    result = {'category':  'platform',
-              'case_name': 'host_path_dir_vol_check',
-              'criteria':  'pass',
-              'details': []
-             }
-
-    status = []
-
-    try:
-        pod_vol = kube.create_namespaced_pod(body=pod_manifest, namespace='default')
-
-        time.sleep(5)
-
-        kube.delete_namespaced_pod(name=pod_vol.metadata.name, namespace='default')
-        result['criteria'] = 'fail'
-
-    except KeyError as error:
-        status.append(error)
-
-    except RuntimeError as error:
-        status.append(error)
-
-    except Exception as error:
-        kube.delete_namespaced_pod(name=pod_vol.metadata.name, namespace='default')
-        result['criteria'] = 'fail'
-        status.append(error)
-
-    result['details'].append(status)
-
-    store_result(logger, result)
-    return result
+    return security_checks(['host_path_dir_vol_check'])[0]
 
 # kubernetes api connectivity check
 def k8s_api_conn_check():
@@ -17,7 +17,14 @@
 Interface for Software Validators
 """
 
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from tools.conf import settings
+from tools.kube_utils import metrics
+from internal.store_result import store_result
+from . import incremental
 
 
 class Validator():
@@ -29,6 +36,71 @@ class Validator():
         """
 
         self._report = {}
+        self._report_lock = threading.Lock()
+        self._checks = []
+
+
+    def add_check(self, check, depends_on=(), inputs=()):
+        """
+        Schedules ``check`` to run on next call to ``run_checks``
+
+        :param check: check function returning a result dict, or a list
+            of result dicts for checks that run several cases together
+        :param depends_on: checks which must finish before ``check`` starts,
+            they must already be scheduled
+        :param inputs: CheckInputs the verdict of ``check`` depends on, with
+            ``incremental_validation`` the verdict of a previous run is
+            reused while they don't change
+        """
+        scheduled = [func for func, _, _ in self._checks]
+        for dependency in depends_on:
+            if dependency not in scheduled:
+                raise ValueError(f'{check.__name__} depends on unscheduled '
+                                 f'check {dependency.__name__}')
+        self._checks.append((check, tuple(depends_on), tuple(inputs)))
+
+
+    def run_checks(self):
+        """
+        Runs all scheduled checks on a bounded thread pool
+
+        Independent checks run concurrently, a check waits only for its
+        dependencies. Results are added to the report in the order in which
+        checks were scheduled, along with metrics of every check in
+        ``details.metadata.checks``.
+        """
+        checks, self._checks = self._checks, []
+        futures = {}
+        verdicts = None
+        if settings.getValue('incremental_validation'):
+            verdicts = incremental.VerdictStore()
+
+        with ThreadPoolExecutor(max_workers=settings.getValue('check_workers')) as executor:
+            # dependencies are always submitted before their dependents, so a
+            # worker never waits on a check still queued behind it
+            for check, depends_on, inputs in checks:
+                waits = [futures[dependency] for dependency in depends_on]
+                futures[check] = executor.submit(run_after, waits, check, inputs, verdicts)
+
+            for check, _, _ in checks:
+                results, check_metrics = futures[check].result()
+                self.update_metrics(check_metrics)
+                if not isinstance(results, list):
+                    results = [results]
+                for result in results:
+                    self.update_report(result)
+
+        if verdicts is not None:
+            verdicts.save()
+
+
+    def update_metrics(self, check_metrics):
+        """
+        Adds CheckMetrics of a check to report metadata
+        """
+        with self._report_lock:
+            metadata = self._report['details'].setdefault('metadata', {})
+            metadata.setdefault('checks', {})[check_metrics.name] = check_metrics.as_dict()
 
 
     def update_report(self, result):
@@ -38,12 +110,13 @@ class Validator():
         case_name = result['case_name']
         criteria = result['criteria']
 
-        self._report['details']['total_checks'] += 1
-        if criteria == 'pass':
-            self._report['details']['pass'].append(case_name)
-        elif criteria == 'fail':
-            self._report['details']['fail'].append(case_name)
-            self._report['criteria'] = 'fail'
+        with self._report_lock:
+            self._report['details']['total_checks'] += 1
+            if criteria == 'pass':
+                self._report['details']['pass'].append(case_name)
+            elif criteria == 'fail':
+                self._report['details']['fail'].append(case_name)
+                self._report['criteria'] = 'fail'
 
 
     def get_report(self):
@@ -58,3 +131,45 @@ class Validator():
         self._report["pod_name"] = pdf['management_info']['resource_pool_name']
 
         return self._report
+
+
+
+def run_after(waits, check, inputs=(), verdicts=None):
+    """
+    Waits for ``waits`` futures to finish and then runs ``check``
+
+    :return: (result of check, CheckMetrics)
+    """
+    for future in waits:
+        future.exception()
+    return metrics.measure(check.__name__, run_check, check, inputs, verdicts)
+
+
+def run_check(check, inputs, verdicts):
+    """
+    Runs ``check``, or reuses its verdict from ``verdicts`` if none of its
+    ``inputs`` changed since it was given
+
+    :return: result of check
+    """
+    if verdicts is None or not inputs:
+        return check()
+
+    logger = logging.getLogger(__name__)
+    key = incremental.check_key(check)
+    try:
+        fingerprint = incremental.fingerprint(check, inputs)
+    except Exception as error:     # pylint: disable=broad-except
+        logger.debug(f'inputs of {key} not fingerprinted: {error}')
+        return check()
+
+    results = verdicts.get(key, fingerprint)
+    if results is not None:
+        metrics.current().reused = True
+        for result in results if isinstance(results, list) else [results]:
+            store_result(logger, result)
+        return results
+
+    results = check()
+    verdicts.put(key, fingerprint, results)
+    return results
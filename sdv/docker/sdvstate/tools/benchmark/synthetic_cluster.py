@@ -0,0 +1,558 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Synthetic cluster
+
+Answers Kubernetes API requests of sdvstate from generated namespaces,
+nodes and pods, with a configurable latency per call. Used in place of
+the connection pool of the shared ApiClient, so requests still go
+through serialization, metrics and the rest of the client stack.
+"""
+
+import copy
+import itertools
+import json
+import re
+import shlex
+import threading
+import time
+from urllib.parse import urlparse, parse_qsl
+
+from tools.kube_utils import ExecResult, metrics
+from tools.kube_utils.recorder import StreamedReplayResponse
+
+
+# apps looked for by name or labels by the airship and kuberef checks,
+# name: (namespace, application, component)
+KNOWN_APPS = {
+    'prometheus': ('monitoring', 'prometheus', 'api'),
+    'grafana': ('monitoring', 'grafana', 'dashboard'),
+    'alertmanager': ('monitoring', 'prometheus-alertmanager', 'server'),
+    'elasticsearch': ('osh-infra', 'elasticsearch', 'client'),
+    'kibana': ('osh-infra', 'kibana', 'dashboard'),
+    'nagios': ('osh-infra', 'nagios', 'monitoring'),
+    'prometheus-elasticsearch-exporter': ('osh-infra', 'prometheus-elasticsearch-exporter',
+                                          'exporter'),
+    'prometheus-fluentd-exporter': ('osh-infra', 'prometheus-fluentd-exporter', 'exporter'),
+    'ceph-mon': ('ceph', 'ceph', 'mon'),
+    'virt-api': ('kubevirt', 'kubevirt', 'virt-api'),
+}
+
+# apps running on every node like DaemonSets
+NODE_APPS = {
+    'nova-compute': ('openstack', 'nova', 'compute'),
+    'openvswitch-vswitchd': ('openstack', 'openvswitch', 'openvswitch-vswitchd'),
+    'neutron-ovs-agent': ('openstack', 'neutron', 'neutron-ovs-agent'),
+    'neutron-sriov-agent': ('openstack', 'neutron', 'neutron-sriov-agent'),
+    'node-exporter': ('monitoring', 'node-exporter', 'metrics'),
+    'collectd': ('monitoring', 'collectd', 'metrics'),
+    'kube-multus': ('kube-system', 'multus', 'cni'),
+    'virt-handler': ('kubevirt', 'kubevirt', 'virt-handler'),
+}
+
+# output of commands run in pods by checks, by command prefix
+EXEC_OUTPUTS = {
+    ('ceph', 'health'): '{"status": "HEALTH_OK"}',
+    ('ovs-vsctl',): '{dpdk-init="true", pmd-cpu-mask="0xf0", dpdk-lcore-mask="0x2"}',
+    ('cat', '/proc/cmdline'): 'BOOT_IMAGE=/vmlinuz root=/dev/sda1 isolcpus=4-15\n',
+    ('cat', '/etc/nova/nova.conf'): ('[DEFAULT]\nvcpu_pin_set = 8-15\n'
+                                     'cpu_allocation_ratio = 1.0\n'
+                                     '[filter_scheduler]\n'
+                                     'enabled_filters = NUMATopologyFilter\n'),
+    ('ls', '/etc/neutron/plugins/ml2/'): 'ml2_conf.ini\n',
+    ('cat', '/etc/neutron/plugins/ml2/'): ('[ml2]\ntype_drivers = flat,vlan\n'
+                                           '[ml2_type_flat]\nflat_networks = *\n'
+                                           '[ml2_type_vlan]\n'
+                                           'network_vlan_ranges = physnet1:100:200\n'),
+    ('cat', '/proc/1/status'): 'CapEff:\t00000000a80425fb\n',
+    ('ls', '/etc/cni/net.d'): '00-multus.conf\n10-calico.conflist\n',
+    ('cat', '/etc/cni/net.d/'): '{"name": "multus-cni-network", "type": "multus"}',
+    ('ls', '/opt/cni/bin'): 'bridge\ncalico\nhost-local\nloopback\nmultus\n',
+}
+
+# bodies served to curl inside the cluster, by url path suffix, other
+# urls answer with an empty body, all with status 200
+HTTP_BODIES = {
+    '/-/healthy': 'Prometheus is Healthy.\n',
+    '/-/ready': 'Prometheus is Ready.\n',
+    '/_cluster/health': '{"cluster_name": "synthetic", "status": "green"}',
+    '/api/status': '{"status": {"overall": {"state": "green"}}}',
+}
+
+KNOWN_NAMESPACES = ('kube-system', 'monitoring', 'ceph', 'ucp', 'osh-infra',
+                    'tenant-ceph', 'openstack', 'kubevirt')
+
+
+class SyntheticCluster():
+    """
+    Synthetic Cluster
+    In-memory cluster serving API requests and execs
+    """
+
+    def __init__(self, *, namespaces=20, nodes=50, pods=2000,
+                 latency=0.0, exec_latency=0.0, failing=0.01):
+        """
+        Initialisation function
+
+        :param namespaces: number of namespaces, at least the known ones
+        :param nodes: number of nodes
+        :param pods: number of pods, spread over namespaces and nodes, at
+            least the known apps and one pod of every node app per node
+        :param latency: seconds every API call takes
+        :param exec_latency: seconds every exec takes
+        :param failing: fraction of pods which are not ready
+        """
+        self.latency = latency
+        self.exec_latency = exec_latency
+        self._lock = threading.Lock()
+        self._uid = itertools.count(1)
+        self._version = itertools.count(1)
+
+        names = list(KNOWN_NAMESPACES)
+        names += [f'ns-{index}' for index in range(max(namespaces - len(names), 0))]
+        self.namespaces = [self._object('Namespace', name) for name in names]
+        self.nodes = [self.node(f'node-{index}') for index in range(nodes)]
+
+        self.pods = {}
+        self._failing_every = int(1 / failing) if failing else 0
+        for node in self.nodes:
+            for app, app_labels in NODE_APPS.items():
+                self.add_pod(app, node['metadata']['name'], app_labels)
+        for index, (app, app_labels) in enumerate(KNOWN_APPS.items()):
+            self.add_pod(app, self.nodes[index % nodes]['metadata']['name'], app_labels)
+        for index in range(len(self.pods), pods):
+            namespace = names[index % len(names)]
+            self.add_pod(f'app-{index % 100}', self.nodes[index % nodes]['metadata']['name'],
+                         (namespace, f'app-{index % 100}', 'server'))
+        self.daemonsets = {}
+        self.jobs = {}
+
+    def add_pod(self, app, node, app_labels):
+        """
+        Adds a pod of ``app`` on ``node``, every few pods is not ready
+        """
+        namespace, application, component = app_labels
+        index = len(self.pods)
+        name = f'{app}-{index}'
+        ready = not (self._failing_every and
+                     index % self._failing_every == self._failing_every - 1)
+        self.pods[(namespace, name)] = self.pod(
+            name, namespace, node, {'application': application, 'component': component},
+            ready=ready)
+
+    def _object(self, kind, name, namespace=None, labels=None):
+        """
+        Returns new object skeleton of ``kind``
+        """
+        metadata = {'name': name, 'uid': str(next(self._uid)),
+                    'resourceVersion': str(next(self._version)),
+                    'creationTimestamp': '2021-01-01T00:00:00Z',
+                    'generation': 1,
+                    'labels': dict(labels or {})}
+        if namespace is not None:
+            metadata['namespace'] = namespace
+        return {'apiVersion': 'v1', 'kind': kind, 'metadata': metadata}
+
+    def node(self, name):
+        """
+        Returns new ready node
+        """
+        node = self._object('Node', name, labels={'kubernetes.io/hostname': name})
+        node['status'] = {
+            'capacity': {'cpu': '64', 'memory': '263846052Ki', 'pods': '110'},
+            'allocatable': {'cpu': '60', 'memory': '253846052Ki', 'pods': '110'},
+            'conditions': [{'type': 'Ready', 'status': 'True'}],
+            'nodeInfo': {'kubeletVersion': 'v1.19.0', 'containerRuntimeVersion': 'docker://19.3.0',
+                         'architecture': 'amd64', 'bootID': '', 'kernelVersion': '5.4.0',
+                         'kubeProxyVersion': 'v1.19.0', 'machineID': '',
+                         'operatingSystem': 'linux', 'osImage': 'Ubuntu 20.04',
+                         'systemUUID': ''}}
+        return node
+
+    def pod(self, name, namespace, node, labels, *, ready=True, spec=None):
+        """
+        Returns new running pod, crash looping unless ``ready``
+        """
+        pod = self._object('Pod', name, namespace, labels)
+        probe = {'httpGet': {'path': '/healthz', 'port': 8080}, 'periodSeconds': 10}
+        pod['spec'] = spec or {
+            'nodeName': node,
+            'containers': [{'name': 'main', 'image': 'synthetic:1',
+                            'readinessProbe': probe, 'livenessProbe': probe,
+                            'resources': {'limits': {'cpu': '1', 'memory': '1Gi'},
+                                          'requests': {'cpu': '100m', 'memory': '128Mi'}}}]}
+        pod['spec'].setdefault('nodeName', node)
+        state = {'running': {'startedAt': '2021-01-01T00:00:00Z'}} if ready else \
+                {'waiting': {'reason': 'CrashLoopBackOff'}}
+        pod['status'] = {
+            'phase': 'Running',
+            'conditions': [{'type': 'PodScheduled', 'status': 'True'},
+                           {'type': 'Ready', 'status': str(ready)}],
+            'containerStatuses': [{'name': container['name'], 'ready': ready,
+                                   'restartCount': 0 if ready else 5,
+                                   'image': container.get('image', ''), 'imageID': '',
+                                   'state': state}
+                                  for container in pod['spec']['containers']]}
+        return pod
+
+    def request(self, method, url, fields=None, body=None, **_):
+        """
+        Answers an API request, called as ``PoolManager.request``
+
+        :return: response with status, headers and body
+        """
+        time.sleep(self.latency)
+        parsed = urlparse(url)
+        query = dict(parse_qsl(parsed.query))
+        query.update({name: str(value) for name, value in (fields or [])})
+        body = json.loads(body) if isinstance(body, (str, bytes)) and body else body
+
+        with self._lock:
+            status, data = self.route(method, parsed.path, query, body)
+
+        if isinstance(data, (dict, list)):
+            data = json.dumps(data)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return StreamedReplayResponse(status, 'OK' if status < 400 else 'Error',
+                                      {'Content-Type': 'application/json',
+                                       'Content-Length': str(len(data))}, data)
+
+    def route(self, method, path, query, body):
+        """
+        Returns (status, body) of request
+        """
+        # pylint: disable=too-many-return-statements
+        parts = path.strip('/').split('/')
+        if parts[:2] == ['api', 'v1']:
+            parts = parts[2:]
+        elif parts[:3] == ['apis', 'apps', 'v1']:
+            return self.route_daemonsets(method, parts[3:], query, body)
+        elif parts[:3] == ['apis', 'batch', 'v1']:
+            return self.route_jobs(method, parts[3:], query, body)
+        else:
+            return not_found(path)
+
+        namespace = None
+        if parts[:1] == ['namespaces'] and len(parts) > 2:
+            namespace, parts = parts[1], parts[2:]
+
+        if parts == ['namespaces']:
+            return 200, self.list('NamespaceList', self.namespaces, query)
+        if parts == ['nodes']:
+            return 200, self.list('NodeList', self.nodes, query)
+        if len(parts) == 4 and parts[0] == 'nodes' and parts[2:] == ['proxy', 'configz']:
+            return 200, {'kubeletconfig': {'cpuManagerPolicy': 'static',
+                                           'topologyManagerPolicy': 'single-numa-node'}}
+        if parts == ['pods']:
+            return self.route_pods(method, namespace, query, body)
+        if len(parts) >= 2 and parts[0] == 'pods':
+            return self.route_pod(method, namespace, parts[1], parts[2:], query=query, body=body)
+        return not_found(path)
+
+    def route_pods(self, method, namespace, query, body):
+        """
+        Answers requests on pod collections
+        """
+        if method == 'POST':
+            name = body['metadata'].get('name') or \
+                f"{body['metadata'].get('generateName', 'pod-')}{next(self._uid)}"
+            node = self.nodes[0]['metadata']['name']
+            pod = self.pod(name, namespace, node, body['metadata'].get('labels'),
+                           spec=body.get('spec'))
+            self.pods[(namespace, name)] = pod
+            return 201, pod
+
+        pods = [pod for (pod_namespace, _), pod in self.pods.items()
+                if namespace in (None, pod_namespace)]
+        pods = select(pods, query)
+        if method == 'DELETE':
+            for pod in pods:
+                del self.pods[(pod['metadata']['namespace'], pod['metadata']['name'])]
+            return 200, {'kind': 'Status', 'status': 'Success'}
+        if query.get('watch') == 'true':
+            return 200, watch_events(pods)
+        return 200, self.list('PodList', pods, query)
+
+    def route_pod(self, method, namespace, name, subresource, *, query, body):
+        """
+        Answers requests on a single pod
+        """
+        # pylint: disable=too-many-arguments
+        pod = self.pods.get((namespace, name))
+        if pod is None:
+            return not_found(name)
+        if subresource == ['log']:
+            lines = int(query.get('tailLines') or 100)
+            return 200, ''.join(f'{name} log line {index}\n' for index in range(lines))
+        if method == 'DELETE':
+            del self.pods[(namespace, name)]
+            return 200, pod
+        if method == 'PATCH':
+            annotations = (body or {}).get('metadata', {}).get('annotations', {})
+            pod['metadata'].setdefault('annotations', {}).update(annotations)
+        return 200, pod
+
+    def route_daemonsets(self, method, parts, query, body):
+        """
+        Answers requests on daemonsets
+        """
+        if len(parts) < 3 or parts[0] != 'namespaces' or parts[2] != 'daemonsets':
+            return not_found('/'.join(parts))
+        namespace = parts[1]
+        if method == 'POST':
+            daemonset = dict(body)
+            daemonset['metadata'] = {**body['metadata'], 'namespace': namespace,
+                                     'generation': 1, 'uid': str(next(self._uid)),
+                                     'resourceVersion': str(next(self._version))}
+            count = len(self.nodes)
+            daemonset['status'] = {'observedGeneration': 1, 'currentNumberScheduled': count,
+                                   'desiredNumberScheduled': count, 'numberReady': count,
+                                   'numberMisscheduled': 0, 'updatedNumberScheduled': count}
+            name = daemonset['metadata']['name']
+            self.daemonsets[(namespace, name)] = daemonset
+            template = body['spec']['template']
+            for node in self.nodes:
+                pod_name = f'{name}-{next(self._uid)}'
+                self.pods[(namespace, pod_name)] = self.pod(
+                    pod_name, namespace, node['metadata']['name'],
+                    template['metadata'].get('labels'), spec=dict(template['spec']))
+            return 201, daemonset
+
+        if len(parts) == 3:
+            daemonsets = [daemonset for (ds_namespace, _), daemonset in self.daemonsets.items()
+                          if ds_namespace == namespace]
+            if query.get('watch') == 'true':
+                return 200, watch_events(select(daemonsets, query))
+            return 200, self.list('DaemonSetList', select(daemonsets, query), query)
+
+        daemonset = self.daemonsets.get((namespace, parts[3]))
+        if daemonset is None:
+            return not_found(parts[3])
+        if method == 'DELETE':
+            del self.daemonsets[(namespace, parts[3])]
+            for key in [key for key in self.pods
+                        if key[0] == namespace and key[1].startswith(parts[3] + '-')]:
+                del self.pods[key]
+        return 200, daemonset
+
+    def route_jobs(self, method, parts, query, body):
+        """
+        Answers requests on jobs, a created job runs its pod right away
+        """
+        if len(parts) < 3 or parts[0] != 'namespaces' or parts[2] != 'jobs':
+            return not_found('/'.join(parts))
+        namespace = parts[1]
+        if method == 'POST':
+            job = self._object('Job', body['metadata'].get('name') or
+                               f"{body['metadata'].get('generateName', 'job-')}{next(self._uid)}",
+                               namespace, body['metadata'].get('labels'))
+            job['spec'] = body['spec']
+            name = job['metadata']['name']
+            self.jobs[(namespace, name)] = job
+            template = body['spec']['template']
+            labels = {**(template['metadata'].get('labels') or {}), 'job-name': name}
+            pod_name = f'{name}-{next(self._uid)}'
+            self.pods[(namespace, pod_name)] = self.pod(
+                pod_name, namespace, self.nodes[0]['metadata']['name'], labels,
+                spec=template['spec'])
+            return 201, job
+
+        jobs = [job for (job_namespace, _), job in self.jobs.items() if job_namespace == namespace]
+        jobs = select(jobs, query) if len(parts) == 3 else \
+            [job for job in jobs if job['metadata']['name'] == parts[3]]
+        if len(parts) > 3 and not jobs:
+            return not_found(parts[3])
+        if method == 'DELETE':
+            for job in jobs:
+                name = job['metadata']['name']
+                del self.jobs[(namespace, name)]
+                for key in [key for key, pod in self.pods.items() if key[0] == namespace and
+                            pod['metadata']['labels'].get('job-name') == name]:
+                    del self.pods[key]
+            return 200, {'kind': 'Status', 'status': 'Success'}
+        if len(parts) == 3:
+            return 200, self.list('JobList', jobs, query)
+        return 200, jobs[0]
+
+    def list(self, kind, items, query):
+        """
+        Returns list object of ``items``, paged with ``limit`` and ``continue``
+        """
+        items = select(items, query)
+        start = int(query.get('continue') or 0)
+        limit = int(query.get('limit') or 0)
+        end = start + limit if limit else len(items)
+        metadata = {'resourceVersion': str(next(self._version))}
+        if end < len(items):
+            metadata['continue'] = str(end)
+        return {'apiVersion': 'v1', 'kind': kind, 'metadata': metadata,
+                'items': items[start:end]}
+
+    def exec(self, _pod, cmd):
+        """
+        Runs ``cmd`` in a pod, answering curl and the http probe script
+        from ``HTTP_BODIES``, other commands with ``EXEC_OUTPUTS`` of the
+        longest matching command prefix or with nothing
+
+        :return: ExecResult
+        """
+        time.sleep(self.exec_latency)
+        metrics.count(exec_calls=1)
+        if cmd[:1] == ['curl']:
+            return ExecResult(0, curl_output(cmd), '')
+        if cmd[:2] == ['sh', '-c'] and 'curl ' in cmd[2]:
+            return ExecResult(0, probe_output(cmd[2]), '')
+        output = ''
+        matched = -1
+        for prefix, prefix_output in EXEC_OUTPUTS.items():
+            if len(prefix) > matched and all(part.startswith(expected) for part, expected
+                                             in zip(cmd, prefix)) and len(cmd) >= len(prefix):
+                output, matched = prefix_output, len(prefix)
+        return ExecResult(0, output, '')
+
+    def serve(self, api_client):
+        """
+        Serves requests of ``api_client`` from this cluster
+        """
+        api_client.rest_client.pool_manager = self
+
+
+def synthetic_pdf(pdf, worker_role):
+    """
+    Returns copy of ``pdf`` with the roles, profiles, networks and CNIs
+    the checks read, matching the synthetic cluster
+
+    :param pdf: PDF to extend, e.g. the empty template
+    :param worker_role: name of the role of compute nodes
+    """
+    pdf = copy.deepcopy(pdf)
+    pdf['roles'] = [{'name': worker_role,
+                     'platform_profile': 'synthetic-platform',
+                     'hardware_profile': 'synthetic-hardware'}]
+    pdf['platform_profiles'] = [{'profile_name': 'synthetic-platform',
+                                 'isolated_cpus': '4-15',
+                                 'vnf_cores': '8-15',
+                                 'vswitch_pmd_cores': '4-7',
+                                 'vswitch_dpdk_lcores': '1',
+                                 'os_reserved_cores': '0,2-3'}]
+    pdf['hardware_profiles'] = [{'profile_name': 'synthetic-hardware',
+                                 'profile_info': {'processor_profile': 'synthetic-cpu'}}]
+    pdf['processor_profiles'] = [{'profile_name': 'synthetic-cpu',
+                                  'profile_info': {'numas': [{'cpu_set': '0-15'}]}}]
+    pdf['physical_networks'] = [{'name': 'physnet1', 'type': 'vlan'}]
+    pdf.setdefault('vim_functional', {}).update(scheduler_filters='NUMATopologyFilter',
+                                                cpu_allocation_ratio='1.0',
+                                                cnis_supported=['bridge', 'calico', 'multus'])
+    return pdf
+
+
+def http_body(url):
+    """
+    Returns body served for ``url`` from ``HTTP_BODIES``
+    """
+    path = urlparse(url if '://' in url else f'http://{url}').path
+    for suffix, body in HTTP_BODIES.items():
+        if path.endswith(suffix):
+            return body
+    return ''
+
+
+def curl_output(cmd):
+    """
+    Returns output of a curl command line ``cmd``, verbose output of
+    ``-v`` included
+    """
+    url = cmd[-1]
+    output = http_body(url)
+    if '-v' in cmd:
+        host = urlparse(url if '://' in url else f'http://{url}').hostname
+        output = f'* Connected to {host} (10.96.0.1) port 443 (#0)\n' + output
+    return output
+
+
+def probe_output(script):
+    """
+    Returns output of an http probe script, every endpoint answers with
+    status 200, bodies written to /dev/null are left out
+    """
+    marker = re.search(r"printf '%s %s %s\\n' (\S+) ", script).group(1)
+    output = ''
+    for index, line in enumerate(line for line in script.splitlines()
+                                 if line.startswith('curl ')):
+        args = shlex.split(line.split(' -o ')[0])
+        body = '' if ' -o /dev/null ' in line else http_body(args[-1])
+        output += f'{marker} {index} 200 0.001\n{body}\n'
+    return output
+
+
+def select(items, query):
+    """
+    Returns items matching label and field selectors of ``query``,
+    only equality selectors are supported
+    """
+    labels = parse_selector(query.get('labelSelector'))
+    fields = parse_selector(query.get('fieldSelector'))
+    selected = []
+    for item in items:
+        item_labels = item['metadata'].get('labels') or {}
+        if any(item_labels.get(key) != value for key, value in labels.items()):
+            continue
+        if any(field_value(item, key) != value for key, value in fields.items()):
+            continue
+        selected.append(item)
+    return selected
+
+
+def parse_selector(selector):
+    """
+    Returns dict of ``key=value`` terms of a selector
+    """
+    terms = {}
+    for term in (selector or '').split(','):
+        match = re.match(r'\s*([^=!\s]+)\s*==?\s*(\S*)\s*$', term)
+        if match:
+            terms[match.group(1)] = match.group(2)
+    return terms
+
+
+def field_value(item, path):
+    """
+    Returns value of dotted field ``path`` of ``item``
+    """
+    value = item
+    for key in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def watch_events(items):
+    """
+    Returns body of a watch which adds ``items``
+    """
+    return ''.join(json.dumps({'type': 'ADDED', 'object': item}) + '\n'
+                   for item in items)
+
+
+def not_found(name):
+    """
+    Returns (status, body) of a 404 response
+    """
+    return 404, {'kind': 'Status', 'status': 'Failure', 'reason': 'NotFound',
+                 'message': f'{name} not found', 'code': 404}
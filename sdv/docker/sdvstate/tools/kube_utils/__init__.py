@@ -0,0 +1,65 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Kubernetes cluster api helper package
+"""
+
+from .kube_utils import load_kube_api
+from .kube_utils import kube_api
+from .kube_utils import kube_apps_api
+from .kube_utils import kube_batch_api
+from .kube_utils import kube_custom_api
+from .kube_utils import list_namespaced_pods
+from .kube_utils import list_all_pods
+from .kube_utils import list_nodes
+from .kube_utils import list_namespaces
+from .kube_utils import iterate_pods
+from .kube_utils import node_configz
+from .kube_utils import snapshot_stats
+from .kube_utils import save_kube_recording
+from .kube_utils import export_api_stats
+from .kube_utils import get_pod_with_labels
+from .kube_utils import get_pods_with_labels
+from .kube_utils import fan_out
+from .kube_utils import kube_exec
+from .kube_utils import kube_exec_result
+from .kube_utils import close_exec_sessions
+from .kube_utils import read_remote
+from .kube_utils import read_remote_file
+from .kube_utils import remote_cache_stats
+from .kube_utils import kube_curl
+from .kube_utils import kube_http_probe
+from .kube_utils import kube_curl_pod
+from .kube_utils import create_kube_curl_pod
+from .kube_utils import delete_kube_curl_pod
+from .kube_utils import release_kube_curl_pod
+from .kube_utils import wait_for_pod
+from .kube_utils import wait_for_pod_phase
+from .kube_utils import wait_for_job_pod
+from .kube_utils import pod_is_scheduled
+from .kube_utils import run_probe_pods
+from .kube_utils import wait_for_daemonset_rollout
+
+from .keyed_cache import KeyedCache
+from .snapshot import ClusterSnapshot, cluster_snapshot
+from .exec_session import ExecResult, ExecSessionError
+from .remote_cache import RemoteCache, remote_cache
+from .informer import PodInformer, pod_informers
+from .http_probe import HttpResponse, http_probes
+from . import metrics
+from .api_stats import ApiStats, api_stats
+from .client_factory import ClientFactory, client_factory
+from .recorder import KubeRecorder, kube_recorder
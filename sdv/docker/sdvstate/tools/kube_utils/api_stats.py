@@ -0,0 +1,182 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+API statistics
+
+Accounts every Kubernetes API request by verb and resource, e.g.
+``list pods`` or ``get nodes/proxy``, with latency percentiles and
+response sizes. Statistics are added to the report and can be exported
+as a Prometheus text file.
+"""
+
+import math
+import os
+import threading
+from urllib.parse import urlsplit
+
+
+class ApiStats():
+    """
+    API Stats
+    Latencies and response sizes of API requests per verb and resource
+    """
+
+    def __init__(self):
+        """
+        Initialization function
+        """
+        self._lock = threading.Lock()
+        self._requests = {}
+
+    def reset(self):
+        """
+        Drops all recorded requests
+        """
+        with self._lock:
+            self._requests = {}
+
+    def record(self, verb, resource, latency, size, failed=False):
+        """
+        Records one request
+
+        :param latency: seconds until response headers were received
+        :param size: response body size in bytes, if known
+        :param failed: True if request failed
+        """
+        with self._lock:
+            entry = self._requests.setdefault((verb, resource),
+                                              {'latencies': [], 'bytes': 0, 'errors': 0})
+            entry['latencies'].append(latency)
+            entry['bytes'] += size
+            entry['errors'] += int(failed)
+
+    def summary(self):
+        """
+        Returns {'<verb> <resource>': {count, errors, bytes, p50, p90, p99, max}}
+        with latencies in seconds, most requested first
+        """
+        with self._lock:
+            requests = {key: dict(entry, latencies=sorted(entry['latencies']))
+                        for key, entry in self._requests.items()}
+
+        summary = {}
+        for (verb, resource), entry in sorted(requests.items(),
+                                              key=lambda item: -len(item[1]['latencies'])):
+            latencies = entry['latencies']
+            summary[f'{verb} {resource}'] = {
+                'count': len(latencies),
+                'errors': entry['errors'],
+                'bytes': entry['bytes'],
+                'p50': percentile(latencies, 50),
+                'p90': percentile(latencies, 90),
+                'p99': percentile(latencies, 99),
+                'max': latencies[-1],
+            }
+        return summary
+
+    def write_prometheus(self, filename):
+        """
+        Writes statistics to ``filename`` in Prometheus text format, e.g.
+        for the node exporter's textfile collector
+        """
+        with self._lock:
+            requests = {key: dict(entry, latencies=sorted(entry['latencies']))
+                        for key, entry in self._requests.items()}
+
+        lines = ['# HELP sdvstate_kube_api_requests_total Kubernetes API requests made',
+                 '# TYPE sdvstate_kube_api_requests_total counter']
+        for (verb, resource), entry in sorted(requests.items()):
+            lines.append(f'sdvstate_kube_api_requests_total{{verb="{verb}",resource="{resource}"}} '
+                         f'{len(entry["latencies"])}')
+
+        lines += ['# HELP sdvstate_kube_api_errors_total Kubernetes API requests failed',
+                  '# TYPE sdvstate_kube_api_errors_total counter']
+        for (verb, resource), entry in sorted(requests.items()):
+            lines.append(f'sdvstate_kube_api_errors_total{{verb="{verb}",resource="{resource}"}} '
+                         f'{entry["errors"]}')
+
+        lines += ['# HELP sdvstate_kube_api_response_bytes_total Kubernetes API response bytes',
+                  '# TYPE sdvstate_kube_api_response_bytes_total counter']
+        for (verb, resource), entry in sorted(requests.items()):
+            lines.append(f'sdvstate_kube_api_response_bytes_total{{verb="{verb}",resource="{resource}"}} '
+                         f'{entry["bytes"]}')
+
+        lines += ['# HELP sdvstate_kube_api_request_duration_seconds Kubernetes API latency',
+                  '# TYPE sdvstate_kube_api_request_duration_seconds summary']
+        for (verb, resource), entry in sorted(requests.items()):
+            labels = f'verb="{verb}",resource="{resource}"'
+            for quantile in (50, 90, 99):
+                lines.append(f'sdvstate_kube_api_request_duration_seconds'
+                             f'{{{labels},quantile="{quantile / 100}"}} '
+                             f'{percentile(entry["latencies"], quantile)}')
+            lines.append(f'sdvstate_kube_api_request_duration_seconds_sum{{{labels}}} '
+                         f'{sum(entry["latencies"])}')
+            lines.append(f'sdvstate_kube_api_request_duration_seconds_count{{{labels}}} '
+                         f'{len(entry["latencies"])}')
+
+        # write and rename, so collectors never read a partial file
+        tmp_name = f'{filename}.tmp'
+        with open(tmp_name, 'w', encoding='utf-8') as fhandle:
+            fhandle.write('\n'.join(lines) + '\n')
+        os.replace(tmp_name, filename)
+
+
+def percentile(values, percent):
+    """
+    Returns nearest-rank ``percent`` percentile of sorted ``values``
+    """
+    if not values:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(values)))
+    return values[rank - 1]
+
+
+def request_kind(method, url, query_params=None):
+    """
+    Returns (verb, resource) of an API request, in the terms used by
+    Kubernetes RBAC and audit logs
+
+    e.g. ('GET', '.../api/v1/namespaces/default/pods') -> ('list', 'pods')
+    """
+    segments = [segment for segment in urlsplit(url).path.split('/') if segment]
+    if segments[:1] == ['api']:
+        segments = segments[2:]
+    elif segments[:1] == ['apis']:
+        segments = segments[3:]
+
+    if segments[:1] == ['namespaces'] and len(segments) > 2:
+        segments = segments[2:]
+
+    if not segments:
+        return method.lower(), 'other'
+
+    resource = segments[0]
+    named = len(segments) > 1
+    if len(segments) > 2:
+        resource = f'{resource}/{segments[2]}'
+
+    watch = any(key == 'watch' and value for key, value in query_params or [])
+    verbs = {'GET': 'get' if named else ('watch' if watch else 'list'),
+             'POST': 'create',
+             'PUT': 'update',
+             'PATCH': 'patch',
+             'DELETE': 'delete' if named else 'deletecollection'}
+    return verbs.get(method, method.lower()), resource
+
+
+# pylint: disable=invalid-name
+api_stats = ApiStats()
@@ -0,0 +1,135 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Kubernetes client factory
+
+Builds one shared ApiClient per run from which all API groups are served,
+so checks reuse the same pool of warm TLS connections to the API server.
+"""
+
+import socket
+import threading
+
+from kubernetes import client, config
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+from tools.conf import settings    # pylint: disable=import-error
+
+from . import metrics
+from .recorder import kube_recorder
+
+
+# transient API server responses retried by the connection pool
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class ClientFactory():
+    """
+    Client Factory
+    Holds the shared ApiClient and the API objects built on it
+    """
+
+    def __init__(self):
+        """
+        Initialisation function
+        """
+        self._lock = threading.Lock()
+        self._api_client = None
+        self._configuration = None
+        self._apis = {}
+
+    def load(self, kube_config):
+        """
+        Builds shared clients from kubeconfig file ``kube_config``
+
+        When replaying a recorded run no kubeconfig is needed.
+        """
+        configuration = client.Configuration()
+        if not kube_recorder.replaying:
+            config.load_kube_config(kube_config, client_configuration=configuration)
+        configuration.connection_pool_maxsize = settings.getValue('kube_pool_maxsize')
+
+        api_client = client.ApiClient(configuration)
+        tune_pool(api_client.rest_client.pool_manager)
+        kube_recorder.install(api_client)
+        metrics.instrument(api_client)
+
+        with self._lock:
+            self._api_client = api_client
+            self._configuration = configuration
+            self._apis = {}
+
+    @property
+    def api_client(self):
+        """
+        Shared ApiClient
+        """
+        return self._api_client
+
+    def api(self, api_class):
+        """
+        Returns ``api_class`` object served from the shared ApiClient
+
+        :param api_class: generated API class, e.g. ``client.CoreV1Api``
+        """
+        with self._lock:
+            if self._api_client is None:
+                raise RuntimeError('kubernetes client is not loaded')
+            if api_class not in self._apis:
+                self._apis[api_class] = api_class(self._api_client)
+            return self._apis[api_class]
+
+    def exec_api(self):
+        """
+        Returns CoreV1Api object for one exec stream
+
+        Every stream gets an ApiClient of its own built from the shared
+        configuration, because ``kubernetes.stream`` temporarily swaps the
+        request method of the client it is called with, which would race
+        with concurrent streams sharing the client. Exec streams are
+        websockets, they don't use the connection pool of the client.
+        """
+        with self._lock:
+            if self._configuration is None:
+                raise RuntimeError('kubernetes client is not loaded')
+            configuration = self._configuration
+        return client.CoreV1Api(client.ApiClient(configuration))
+
+
+def tune_pool(pool_manager):
+    """
+    Configures HTTP retries and TCP keep-alive of connections opened by
+    ``pool_manager``
+
+    Only idempotent requests are retried, on connection errors and on
+    ``RETRY_STATUSES``, honouring Retry-After of the API server.
+    """
+    pool_manager.connection_pool_kw['retries'] = Retry(
+        total=settings.getValue('kube_retries'),
+        backoff_factor=settings.getValue('kube_retry_backoff'),
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False)
+
+    if settings.getValue('kube_tcp_keepalive'):
+        socket_options = list(HTTPConnection.default_socket_options)
+        socket_options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        pool_manager.connection_pool_kw['socket_options'] = socket_options
+
+
+# pylint: disable=invalid-name
+client_factory = ClientFactory()
@@ -0,0 +1,214 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Exec sessions
+
+Keeps one interactive shell open per pod and runs commands over it,
+so that repeated execs into a pod do not pay for a new websocket each.
+"""
+
+import collections
+import logging
+import shlex
+import threading
+import time
+import uuid
+
+from kubernetes.stream import stream
+
+
+ExecResult = collections.namedtuple('ExecResult', ['returncode', 'stdout', 'stderr'])
+
+
+class ExecSessionError(Exception):
+    """
+    Raised when a command could not be run over an exec session
+    """
+
+
+class ExecSession():
+    """
+    Interactive ``/bin/sh`` stream into a pod
+
+    Every command is followed by a unique marker on stdout (carrying the
+    exit code) and on stderr, which frames its output on both channels.
+    """
+
+    def __init__(self, api, pod):
+        """
+        Initialisation function, opens the shell stream
+        """
+        self._logger = logging.getLogger(__name__)
+        self.name = f'{pod.metadata.namespace}/{pod.metadata.name}'
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        # set once closed by us, e.g. evicted, rather than by the pod
+        self.closed = False
+        self._stream = stream(api.connect_get_namespaced_pod_exec,
+                              pod.metadata.name, pod.metadata.namespace,
+                              command=['/bin/sh'],
+                              stderr=True, stdin=True, stdout=True, tty=False,
+                              _preload_content=False)
+
+    def is_open(self):
+        """
+        True if shell stream is still alive
+        """
+        return self._stream.is_open()
+
+    def run(self, cmd, timeout):
+        """
+        Runs ``cmd`` in the shell and returns its ExecResult
+
+        :param cmd: command to execute as list of args
+        :param timeout: seconds to wait for command to finish
+        """
+        marker = f'__sdvstate_{uuid.uuid4().hex}__'
+        command = ' '.join(shlex.quote(arg) for arg in cmd)
+        self._stream.write_stdin(f'{command} </dev/null; __sdv_rc=$?; '
+                                 f'printf \'%s %d\\n\' {marker} "$__sdv_rc"; '
+                                 f'printf \'%s\\n\' {marker} >&2\n')
+
+        stdout, stderr = '', ''
+        deadline = time.monotonic() + timeout
+        while not (marker in stderr and '\n' in stdout.partition(marker)[2]):
+            if not self._stream.is_open():
+                raise ExecSessionError(f'exec session to {self.name} closed')
+            if time.monotonic() > deadline:
+                raise ExecSessionError(f'command timed out in {self.name}: {command}')
+            self._stream.update(timeout=1)
+            stdout += self._stream.read_stdout(timeout=0)
+            stderr += self._stream.read_stderr(timeout=0)
+
+        # drop data buffered for non-interactive reads
+        self._stream.read_all()
+        self.last_used = time.monotonic()
+
+        stdout, status = stdout.split(marker, 1)
+        stderr = stderr.split(marker, 1)[0]
+        return ExecResult(int(status.split()[0]), stdout, stderr)
+
+    def close(self):
+        """
+        Closes the shell stream
+        """
+        self.closed = True
+        try:
+            self._stream.close()
+        except Exception as error:  # pylint: disable=broad-except
+            self._logger.debug(f'closing exec session {self.name}: {error}')
+
+
+class ExecSessionPool():
+    """
+    Pool of ExecSession keyed by pod
+
+    Sessions idle for more than ``idle_timeout`` seconds are evicted.
+    Pods without a usable shell are remembered and skipped.
+    """
+
+    def __init__(self):
+        """
+        Initialisation function
+        """
+        self._logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._unsupported = set()
+
+    def supports(self, pod):
+        """
+        False if ``pod`` is known to not support exec sessions
+        """
+        with self._lock:
+            return pod.metadata.uid not in self._unsupported
+
+    def execute(self, api, pod, cmd, timeout, idle_timeout):
+        """
+        Runs ``cmd`` in ``pod`` over a pooled session
+
+        :raises ExecSessionError: if command could not be run over a session
+        """
+        self.evict_idle(idle_timeout)
+        key = pod.metadata.uid
+
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                # keep it from being evicted before we use it
+                session.last_used = time.monotonic()
+
+        if session is None:
+            try:
+                new_session = ExecSession(api, pod)
+            except Exception as error:  # pylint: disable=broad-except
+                with self._lock:
+                    self._unsupported.add(key)
+                raise ExecSessionError(str(error)) from error
+            with self._lock:
+                session = self._sessions.setdefault(key, new_session)
+            if session is not new_session:
+                new_session.close()
+
+        with session.lock:
+            try:
+                return session.run(cmd, timeout)
+            except ExecSessionError:
+                if not session.is_open() and not session.closed:
+                    # e.g. no /bin/sh in the image, don't try again
+                    with self._lock:
+                        self._unsupported.add(key)
+                self._discard(key, session)
+                raise
+
+    def _discard(self, key, session):
+        """
+        Removes ``session`` from pool and closes it
+        """
+        with self._lock:
+            if self._sessions.get(key) is session:
+                del self._sessions[key]
+        session.close()
+
+    def evict_idle(self, idle_timeout):
+        """
+        Closes sessions idle for more than ``idle_timeout`` seconds
+        """
+        now = time.monotonic()
+        # taken out of the pool before closing, so that no check picks
+        # them up in between
+        with self._lock:
+            idle = [key for key, session in self._sessions.items()
+                    if now - session.last_used > idle_timeout
+                    and not session.lock.locked()]
+            evicted = [self._sessions.pop(key) for key in idle]
+        for session in evicted:
+            self._logger.debug(f'evicting idle exec session {session.name}')
+            session.close()
+
+    def close_all(self):
+        """
+        Closes all sessions
+        """
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+            self._unsupported = set()
+        for session in sessions.values():
+            session.close()
+
+
+# pylint: disable=invalid-name
+exec_sessions = ExecSessionPool()
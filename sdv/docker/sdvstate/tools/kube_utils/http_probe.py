@@ -0,0 +1,93 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+HTTP probe
+
+Builds a single shell script which requests many HTTP endpoints
+concurrently with curl, and parses its output back into one
+HttpResponse per endpoint. Running the script with one exec replaces
+one exec per curl call.
+"""
+
+import collections
+import re
+import shlex
+import uuid
+
+from .keyed_cache import KeyedCache
+
+
+HttpResponse = collections.namedtuple('HttpResponse', ['status', 'latency', 'body'])
+HttpResponse.__doc__ = """
+Response of an endpoint, ``status`` is 0 if no response was received
+and ``latency`` is in seconds
+"""
+
+
+def probe_script(endpoints, timeout, marker):
+    """
+    Returns shell script requesting all ``endpoints`` concurrently
+
+    :param endpoints: list of (url, user, password, status_only), user may
+        be None, the body of ``status_only`` endpoints is discarded in the
+        pod and their HttpResponse has an empty body
+    :param timeout: seconds allowed per request
+    :param marker: unique string framing each endpoint's output
+    """
+    lines = ['d=$(mktemp -d)']
+    for index, (url, user, password, status_only) in enumerate(endpoints):
+        args = ['curl', '-sL', '-m', str(timeout), '-w', '%{http_code} %{time_total}']
+        if user is not None:
+            args += ['-u', f'{user}:{password}']
+        args.append(url)
+        command = ' '.join(shlex.quote(arg) for arg in args)
+        output = '/dev/null' if status_only else f'"$d/{index}"'
+        lines.append(f'{command} -o {output} > "$d/{index}.meta" 2>/dev/null &')
+    lines.append('wait')
+    lines.append(f'for i in {" ".join(str(i) for i in range(len(endpoints)))}; do')
+    lines.append(f'  printf \'%s %s %s\\n\' {marker} "$i" "$(cat "$d/$i.meta" 2>/dev/null)"')
+    lines.append('  cat "$d/$i" 2>/dev/null; printf \'\\n\'')
+    lines.append('done')
+    lines.append('rm -rf "$d"')
+    return '\n'.join(lines)
+
+
+def parse_probe_output(output, count, marker):
+    """
+    Returns list of ``count`` HttpResponse parsed from script output
+    """
+    responses = [HttpResponse(0, None, '')] * count
+    parts = re.split(f'{re.escape(marker)} (\\d+) ?([^\\n]*)\\n', output)
+    # parts: [preamble, index, meta, body, index, meta, body, ..]
+    for i in range(1, len(parts) - 2, 3):
+        index, meta, body = int(parts[i]), parts[i + 1].split(), parts[i + 2]
+        status = int(meta[0]) if meta else 0
+        latency = float(meta[1]) if len(meta) > 1 else None
+        responses[index] = HttpResponse(status, latency, body[:-1] if body.endswith('\n') else body)
+    return responses
+
+
+def new_marker():
+    """
+    Returns a unique output marker
+    """
+    return f'__sdvstate_probe_{uuid.uuid4().hex}__'
+
+
+# responses of probes made in this run, reset with every run
+# pylint: disable=invalid-name
+http_probes = KeyedCache('http probe')
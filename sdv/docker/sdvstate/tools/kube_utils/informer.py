@@ -0,0 +1,174 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Pod informer
+
+Keeps an in-memory index of pods of a namespace up to date with one
+initial list followed by a watch, for long-lived sdvstate processes that
+validate the same cluster repeatedly.
+"""
+
+import logging
+import threading
+
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+
+class PodInformer():
+    """
+    Pod Informer
+    Mirrors pods of one namespace in memory
+    """
+
+    def __init__(self, api, namespace, watch_timeout=300):
+        """
+        Initialisation function
+
+        :param api: CoreV1Api object
+        :param namespace: namespace to watch
+        :param watch_timeout: seconds after which a watch is re-established
+        """
+        self._logger = logging.getLogger(__name__)
+        self._api = api
+        self._namespace = namespace
+        self._watch_timeout = watch_timeout
+        self._lock = threading.Lock()
+        self._pods = {}
+        self._resource_version = None
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Lists pods and starts watching for changes in background
+        """
+        self._relist()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f'informer-{self._namespace}')
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops watching
+        """
+        self._stopped.set()
+
+    def is_alive(self):
+        """
+        True if informer is watching
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def pods(self):
+        """
+        Returns list of pods currently in the namespace
+        """
+        self._synced.wait()
+        with self._lock:
+            return list(self._pods.values())
+
+    def _relist(self):
+        """
+        Replaces index with a fresh list of pods
+        """
+        pod_list = self._api.list_namespaced_pod(self._namespace)
+        with self._lock:
+            self._pods = {pod.metadata.uid: pod for pod in pod_list.items}
+            self._resource_version = pod_list.metadata.resource_version
+        self._synced.set()
+        self._logger.debug(f'informer: listed {len(pod_list.items)} pods '
+                           f'in {self._namespace}')
+
+    def _run(self):
+        """
+        Watch loop, applies events to index until stopped
+        """
+        while not self._stopped.is_set():
+            try:
+                self._watch()
+            except ApiException as error:
+                if error.status != 410:
+                    self._logger.warning(f'informer {self._namespace}: {error}')
+                # resourceVersion too old or watch broken, start over
+                self._relist()
+            except Exception as error:  # pylint: disable=broad-except
+                self._logger.warning(f'informer {self._namespace}: {error}')
+                self._stopped.wait(5)
+                self._relist()
+
+    def _watch(self):
+        """
+        Watches pods from last seen resourceVersion
+        """
+        stream = watch.Watch().stream(self._api.list_namespaced_pod,
+                                      self._namespace,
+                                      resource_version=self._resource_version,
+                                      timeout_seconds=self._watch_timeout)
+        for event in stream:
+            if self._stopped.is_set():
+                return
+            if event['type'] == 'ERROR':
+                raise ApiException(status=event['raw_object'].get('code'),
+                                   reason=event['raw_object'].get('message'))
+
+            pod = event['object']
+            with self._lock:
+                if event['type'] == 'DELETED':
+                    self._pods.pop(pod.metadata.uid, None)
+                else:
+                    self._pods[pod.metadata.uid] = pod
+                self._resource_version = pod.metadata.resource_version
+
+
+class InformerRegistry():
+    """
+    Informer Registry
+    One shared PodInformer per namespace for the lifetime of the process
+    """
+
+    def __init__(self):
+        """
+        Initialisation function
+        """
+        self._lock = threading.Lock()
+        self._informers = {}
+
+    def pods(self, api, namespace, watch_timeout):
+        """
+        Returns pods of ``namespace``, starting an informer on first use
+        """
+        with self._lock:
+            informer = self._informers.get(namespace)
+            if informer is None or not informer.is_alive():
+                informer = PodInformer(api, namespace, watch_timeout)
+                informer.start()
+                self._informers[namespace] = informer
+        return informer.pods()
+
+    def stop_all(self):
+        """
+        Stops all informers
+        """
+        with self._lock:
+            informers, self._informers = self._informers, {}
+        for informer in informers.values():
+            informer.stop()
+
+
+# pylint: disable=invalid-name
+pod_informers = InformerRegistry()
@@ -0,0 +1,98 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Keyed cache
+
+Thread safe cache of values by key shared by all checks, the base of
+the cluster snapshot and the remote artifact cache.
+"""
+
+import logging
+import threading
+import time
+
+
+class KeyedCache():
+    """
+    Keyed Cache
+    Serves repeated requests for a key from memory until its entry
+    expires or its version changes
+    """
+
+    def __init__(self, name):
+        """
+        Initialization function
+
+        :param name: name of cache used in log messages
+        """
+        self._logger = logging.getLogger(__name__)
+        self._name = name
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._key_locks = {}
+        self._hits = 0
+        self._misses = 0
+
+    def reset(self):
+        """
+        Drops all cached entries and counters
+        """
+        with self._lock:
+            self._entries = {}
+            self._hits = 0
+            self._misses = 0
+
+    def get(self, key, fetch, version=None, ttl=0, refresh=False):
+        """
+        Returns cached value of ``key``, calls ``fetch`` on a miss
+
+        Concurrent requests for the same ``key`` wait for a single fetch.
+
+        :param key: hashable key of value
+        :param fetch: function returning value of ``key``
+        :param version: version of value, an entry of another version is
+            fetched again, e.g. resourceVersion of the object it is read from
+        :param ttl: seconds an entry is served, 0 to serve it until reset
+        :param refresh: bypass cached entry and fetch it again
+        """
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry is not None and not refresh:
+                fetched_at, entry_version, value = entry
+                if entry_version == version and \
+                   (ttl == 0 or time.monotonic() - fetched_at < ttl):
+                    with self._lock:
+                        self._hits += 1
+                    return value
+
+            value = fetch()
+            with self._lock:
+                self._misses += 1
+                self._entries[key] = (time.monotonic(), version, value)
+            self._logger.debug(f'{self._name}: fetched {key}')
+            return value
+
+    def stats(self):
+        """
+        Returns hit/miss counters of the cache
+        """
+        with self._lock:
+            return {'hits': self._hits,
+                    'misses': self._misses}
@@ -0,0 +1,828 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Kubernetes cluster api helper functions
+"""
+
+import copy
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from kubernetes import client, watch
+from kubernetes.stream import stream
+
+from tools.conf import settings    # pylint: disable=import-error
+
+from .snapshot import cluster_snapshot
+from .exec_session import exec_sessions, ExecResult, ExecSessionError
+from .remote_cache import remote_cache
+from .informer import pod_informers
+from .http_probe import probe_script, parse_probe_output, new_marker, http_probes
+from . import metrics
+from .api_stats import api_stats
+from .client_factory import client_factory
+from .recorder import kube_recorder
+
+
+_CURL_POD_LOCK = threading.Lock()
+# curl pod resolved in this run
+_CURL_POD = {'pod': None}
+
+CURL_POD_LABEL = 'application=sdvstate-curl'
+CURL_POD_LAST_USED = 'sdvstate/last-used'
+
+
+def load_kube_api():
+    """
+    Loads kubernetes api
+    """
+    kube_recorder.start(record_file=settings.getValue('kube_record'),
+                        replay_file=settings.getValue('kube_replay'))
+    # a replayed run needs no kubeconfig
+    client_factory.load(None if kube_recorder.replaying
+                        else settings.getValue('kube_config'))
+    settings.setValue('kube_api', client_factory.api(client.CoreV1Api))
+    settings.setValue('kube_apps_api', client_factory.api(client.AppsV1Api))
+    settings.setValue('kube_batch_api', client_factory.api(client.BatchV1Api))
+    settings.setValue('kube_custom_api', client_factory.api(client.CustomObjectsApi))
+    cluster_snapshot.reset()
+    remote_cache.reset()
+    http_probes.reset()
+    exec_sessions.close_all()
+    api_stats.reset()
+    _CURL_POD['pod'] = None
+
+
+def kube_api():
+    """
+    Returns kube_api object
+    """
+    return settings.getValue('kube_api')
+
+
+def kube_apps_api():
+    """
+    Returns AppsV1Api object
+    """
+    return settings.getValue('kube_apps_api')
+
+
+def kube_batch_api():
+    """
+    Returns BatchV1Api object
+    """
+    return settings.getValue('kube_batch_api')
+
+
+def kube_custom_api():
+    """
+    Returns CustomObjectsApi object
+    """
+    return settings.getValue('kube_custom_api')
+
+
+def list_namespaced_pods(namespace, refresh=False):
+    """
+    Returns pods of ``namespace`` from the cluster snapshot
+
+    When ``pod_informer`` is enabled pods are served from a watch based
+    informer which lives as long as the process, see ``state --validation-interval``.
+
+    :param namespace: namespace to list pods from
+    :param refresh: bypass cached list and fetch it again
+    :return: list of pod objects
+    """
+    # informers watch forever, a replayed run has nothing to watch
+    if settings.getValue('pod_informer') and not refresh and not kube_recorder.replaying:
+        return pod_informers.pods(kube_api(), namespace,
+                                  settings.getValue('pod_informer_watch_timeout'))
+    return cluster_snapshot.namespaced_pods(kube_api(), namespace, refresh)
+
+
+def list_all_pods(refresh=False):
+    """
+    Returns pods of all namespaces from the cluster snapshot
+    """
+    return cluster_snapshot.all_pods(kube_api(), refresh)
+
+
+def list_nodes(refresh=False):
+    """
+    Returns nodes from the cluster snapshot
+    """
+    return cluster_snapshot.nodes(kube_api(), refresh)
+
+
+def list_namespaces(refresh=False):
+    """
+    Returns namespaces from the cluster snapshot
+    """
+    return cluster_snapshot.namespaces(kube_api(), refresh)
+
+
+def iterate_pods(namespace=None, label_selector=None, field_selector=None, page_size=None):
+    """
+    Yields pods page by page using ``limit`` and ``continue``
+
+    Only one page is held in memory at a time, which keeps memory flat
+    on large clusters. Bypasses the cluster snapshot.
+
+    :param namespace: namespace to list pods from, default all namespaces
+    :param label_selector: server side label selector
+    :param field_selector: server side field selector
+    :param page_size: pods per page, defaults to ``pod_list_page_size``
+    :return: generator of pod objects
+    """
+    api = kube_api()
+    kwargs = {'limit': page_size or settings.getValue('pod_list_page_size')}
+    if label_selector:
+        kwargs['label_selector'] = label_selector
+    if field_selector:
+        kwargs['field_selector'] = field_selector
+
+    continue_token = None
+    while True:
+        if continue_token:
+            kwargs['_continue'] = continue_token
+        if namespace is None:
+            page = api.list_pod_for_all_namespaces(**kwargs)
+        else:
+            page = api.list_namespaced_pod(namespace, **kwargs)
+
+        yield from page.items
+
+        continue_token = page.metadata._continue    # pylint: disable=protected-access
+        if not continue_token:
+            break
+
+
+def node_configz(refresh=False):
+    """
+    Returns kubelet configuration of all nodes
+
+    Configs are fetched concurrently through the API server's node proxy
+    and kept in the cluster snapshot, so all kubelet config checks of a
+    run share one sweep over the nodes.
+
+    :param refresh: bypass cached configs and fetch them again
+    :return: dict {node name: parsed configz, or exception if it could
+        not be fetched}
+    """
+    api = kube_api()
+
+    def fetch_one(node):
+        try:
+            response = api.connect_get_node_proxy_with_path(node, 'configz',
+                                                            _preload_content=False)
+            return json.loads(response.data)
+        except Exception as error:     # pylint: disable=broad-except
+            return error
+
+    def fetch():
+        names = [node.metadata.name for node in list_nodes()]
+        return dict(zip(names, fan_out(fetch_one, names)))
+
+    return cluster_snapshot.get(('configz',), fetch, refresh)
+
+
+def export_api_stats():
+    """
+    Returns API request statistics of the run, and writes them to
+    ``kube_api_stats_file`` in Prometheus text format if it is set
+    """
+    filename = settings.getValue('kube_api_stats_file')
+    if filename:
+        api_stats.write_prometheus(filename)
+    return api_stats.summary()
+
+
+def save_kube_recording():
+    """
+    Writes API responses and exec outputs of the run to ``kube_record``
+    archive, if it is set
+    """
+    kube_recorder.save()
+
+
+def snapshot_stats():
+    """
+    Returns hit/miss counters of the cluster snapshot
+    """
+    return cluster_snapshot.stats()
+
+
+def get_pod_with_labels(labels, cached=False, node=None):
+    """
+    Returns json details any one pod with matching labels
+
+    :param labels: labels to find matching pod
+    :param cached: resolve pod from the cluster snapshot
+    :param node: only consider pods scheduled on this node
+    :return: pod details
+    """
+    if cached or node is not None:
+        return get_pods_with_labels(labels, node, refresh=not cached)[0]
+    api = kube_api()
+    pod = api.list_pod_for_all_namespaces(label_selector=labels).items[0]
+    return pod
+
+
+def get_pods_with_labels(labels, node=None, refresh=False):
+    """
+    Returns all pods with matching labels from the cluster snapshot
+
+    :param labels: labels to find matching pods
+    :param node: only return pods scheduled on this node
+    :param refresh: bypass cached list and fetch it again
+    :return: list of pods
+    """
+    pods = cluster_snapshot.labeled_pods(kube_api(), labels, refresh)
+    if node is not None:
+        pods = [pod for pod in pods if pod.spec.node_name == node]
+    return pods
+
+
+def fan_out(func, items, workers=None):
+    """
+    Calls ``func`` on every item of ``items`` concurrently
+
+    :param func: function taking one item
+    :param items: iterable of items
+    :param workers: concurrency limit, defaults to ``fan_out_workers``
+    :return: list of results in order of ``items``
+    """
+    if workers is None:
+        workers = settings.getValue('fan_out_workers')
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(metrics.bind(func), items))
+
+
+def kube_exec(pod, cmd):
+    """
+    Executes `cmd` inside `pod` and returns response
+
+    :param pod: pod object
+    :param cmd: command to execute inside pod
+    :return: response from pod
+    """
+    result = kube_exec_result(pod, cmd)
+    return result.stdout + result.stderr
+
+
+def kube_exec_result(pod, cmd):
+    """
+    Executes `cmd` inside `pod` and returns ExecResult with separate
+    exit code, stdout and stderr
+
+    Commands run over a pooled shell session to the pod when
+    ``exec_session_reuse`` is enabled, otherwise or if the pod has no
+    usable shell, a new exec stream is opened for the command. Output is
+    served from the archive when replaying a recorded run.
+
+    :param pod: pod object
+    :param cmd: command to execute inside pod
+    :return: ExecResult
+    """
+    return kube_recorder.exec(pod, cmd, lambda: exec_in_pod(pod, cmd))
+
+
+def exec_in_pod(pod, cmd):
+    """
+    Executes `cmd` inside `pod` over a pooled session or a new exec stream
+
+    :return: ExecResult
+    """
+    api = client_factory.exec_api()
+
+    if settings.getValue('exec_session_reuse') and exec_sessions.supports(pod):
+        try:
+            result = exec_sessions.execute(api, pod, cmd,
+                                           settings.getValue('exec_timeout'),
+                                           settings.getValue('exec_session_idle_timeout'))
+            metrics.count(exec_calls=1, bytes=len(result.stdout) + len(result.stderr))
+            return result
+        except ExecSessionError as error:
+            metrics.count(retries=1)
+            logging.getLogger(__name__).debug(f'exec session failed, '
+                                              f'falling back to single exec: {error}')
+
+    response = stream(api.connect_get_namespaced_pod_exec,
+                      pod.metadata.name, pod.metadata.namespace, command=cmd,
+                      stderr=True, stdin=False, stdout=True, tty=False,
+                      _preload_content=False)
+    response.run_forever(timeout=settings.getValue('exec_timeout'))
+    stdout = response.read_stdout(timeout=0)
+    stderr = response.read_stderr(timeout=0)
+    try:
+        returncode = response.returncode
+    except (TypeError, KeyError):
+        # stream closed without reporting a status
+        returncode = None
+    response.close()
+    metrics.count(exec_calls=1, bytes=len(stdout) + len(stderr))
+    return ExecResult(returncode, stdout, stderr)
+
+
+def read_remote(pod, cmd, parser=None):
+    """
+    Returns output of `cmd` inside `pod` parsed with `parser`
+
+    Output is memoized per pod and command until the pod's
+    resourceVersion changes, so checks reading the same artifact
+    share one exec and one parse.
+
+    :param pod: pod object
+    :param cmd: command to execute inside pod
+    :param parser: function to parse command output, default returns raw output
+    :return: parsed output
+    """
+    return remote_cache.get(pod, cmd, kube_exec, parser)
+
+
+def read_remote_file(pod, path, parser=None):
+    """
+    Returns content of file at `path` inside `pod` parsed with `parser`
+    """
+    return read_remote(pod, ['cat', path], parser)
+
+
+def remote_cache_stats():
+    """
+    Returns hit/miss counters of the remote artifact cache
+    """
+    return remote_cache.stats()
+
+
+def close_exec_sessions():
+    """
+    Closes all pooled exec sessions
+    """
+    exec_sessions.close_all()
+
+
+def kube_curl(*args):
+    """
+    executes curl cmd in kubernetes network
+
+    :param args: comma separated list of args to pass to curl
+    :return: http response
+    """
+    args = list(args)
+    args.insert(0, "curl")
+
+    response = kube_exec(kube_curl_pod(), args)
+
+    return response
+
+
+def kube_http_probe(endpoints, timeout=3):
+    """
+    Requests all ``endpoints`` from inside kubernetes network with one
+    exec into the curl pod, requests run concurrently
+
+    :param endpoints: list of (url, user, password, status_only), user may
+        be None, only the status of ``status_only`` endpoints is returned
+    :param timeout: seconds allowed per request
+    :return: list of HttpResponse(status, latency, body) in order of ``endpoints``
+    """
+    if not endpoints:
+        return []
+    marker = kube_recorder.value('http_probe_marker', new_marker)
+    script = probe_script(endpoints, timeout, marker)
+    result = kube_exec_result(kube_curl_pod(), ['sh', '-c', script])
+    return parse_probe_output(result.stdout, len(endpoints), marker)
+
+
+def kube_curl_pod():
+    """
+    Returns curl utility pod, creates it if needed
+
+    A pod left by a previous run is reused if it is healthy, i.e. running,
+    ready and on the pinned ``curl_pod_image``, and is not about to exit,
+    otherwise it is deleted and a new one is created. The pod is resolved
+    once per run.
+    """
+    # concurrent checks must not race to create the pod
+    with _CURL_POD_LOCK:
+        if _CURL_POD['pod'] is not None:
+            return _CURL_POD['pod']
+
+        api = kube_api()
+        pods = api.list_namespaced_pod('default',
+                                       label_selector=CURL_POD_LABEL).items
+        pod = None
+        for candidate in pods:
+            if candidate.metadata.deletion_timestamp is None and \
+               pod is None and curl_pod_is_reusable(candidate):
+                pod = candidate
+            elif candidate.metadata.deletion_timestamp is None:
+                remove_curl_pod(candidate)
+
+        if pod is None:
+            pod = create_kube_curl_pod()
+        else:
+            touch_kube_curl_pod(pod)
+        _CURL_POD['pod'] = pod
+    return pod
+
+
+def curl_pod_is_healthy(pod):
+    """
+    True if curl pod is running, ready and on the pinned image
+    """
+    if pod.status.phase != 'Running' or not pod.status.container_statuses:
+        return False
+    if pod.spec.containers[0].image != settings.getValue('curl_pod_image'):
+        return False
+    return all(container.ready for container in pod.status.container_statuses)
+
+
+def curl_pod_is_reusable(pod):
+    """
+    True if curl pod is healthy and, with ``curl_pod_ttl`` set, has at
+    least ``curl_pod_reuse_margin`` seconds left before it exits
+
+    The pod sees a new last use only once kubelet refreshes its downward
+    API volume, which may take a minute or more, so a pod close to the end
+    of its TTL could exit during the run although it was touched.
+    """
+    if not curl_pod_is_healthy(pod):
+        return False
+    ttl = settings.getValue('curl_pod_ttl')
+    if not ttl:
+        return True
+    try:
+        last_used = int((pod.metadata.annotations or {})[CURL_POD_LAST_USED])
+    except (KeyError, ValueError):
+        return False
+    return last_used + ttl - time.time() > settings.getValue('curl_pod_reuse_margin')
+
+
+def touch_kube_curl_pod(pod):
+    """
+    Marks curl pod as used now, it stops itself ``curl_pod_ttl`` seconds
+    after its last use
+    """
+    kube_api().patch_namespaced_pod(
+        name=pod.metadata.name, namespace='default',
+        body={'metadata': {'annotations': {CURL_POD_LAST_USED: str(int(time.time()))}}})
+
+
+def create_kube_curl_pod():
+    """
+    Create a sandbox pod(image: ``curl_pod_image``) for
+    curl utility inside kubernetes cluster.
+
+    With ``curl_pod_ttl`` set, the pod exits by itself once it has not
+    been used for that many seconds. It reads its last use from its own
+    annotation, mounted with the downward API. Such a pod is run by a Job
+    with ``ttlSecondsAfterFinished``, so the cluster deletes it as soon
+    as it has exited.
+
+    :return: pod object
+    """
+    print(("Creating pod sdvstate-curl..."))
+    ttl = settings.getValue('curl_pod_ttl')
+    if ttl:
+        loop = ('while [ $(( $(date +%s) - $(cat /etc/sdvstate/last-used 2>/dev/null '
+                f'|| date +%s) )) -lt {int(ttl)} ]; do sleep 5; done')
+    else:
+        loop = 'while true; do sleep 5; done'
+
+    pod_manifest = {
+        'apiVersion': 'v1',
+        'kind': 'Pod',
+        'metadata': {
+            'generateName': 'sdvstate-curl-',
+            'labels': {
+                'application': 'sdvstate-curl'
+            },
+            'annotations': {
+                CURL_POD_LAST_USED: str(int(time.time()))
+            }
+        },
+        'spec': {
+            'restartPolicy': 'Never',
+            'containers': [{
+                'image': settings.getValue('curl_pod_image'),
+                'name': 'sdvstate-curl',
+                'command': ["/bin/sh"],
+                "args": [
+                    "-c",
+                    loop
+                ],
+                'volumeMounts': [{
+                    'name': 'sdvstate',
+                    'mountPath': '/etc/sdvstate'
+                }]
+            }],
+            'volumes': [{
+                'name': 'sdvstate',
+                'downwardAPI': {
+                    'items': [{
+                        'path': 'last-used',
+                        'fieldRef': {
+                            'fieldPath': f"metadata.annotations['{CURL_POD_LAST_USED}']"
+                        }
+                    }]
+                }
+            }]
+        }
+    }
+
+    # wait 1 minute or less for pod to create.
+    try:
+        if not ttl:
+            pod = kube_api().create_namespaced_pod(body=pod_manifest, namespace='default')
+            return wait_for_pod_phase(pod.metadata.name, 'default', timeout=60)
+
+        job_manifest = {
+            'apiVersion': 'batch/v1',
+            'kind': 'Job',
+            'metadata': {
+                'generateName': 'sdvstate-curl-',
+                'labels': {
+                    'application': 'sdvstate-curl'
+                }
+            },
+            'spec': {
+                'backoffLimit': 0,
+                'ttlSecondsAfterFinished': 0,
+                'template': {
+                    'metadata': {key: value for key, value in pod_manifest['metadata'].items()
+                                 if key != 'generateName'},
+                    'spec': pod_manifest['spec']
+                }
+            }
+        }
+        job = kube_batch_api().create_namespaced_job(body=job_manifest, namespace='default')
+        return wait_for_job_pod(job.metadata.name, 'default', timeout=60)
+    except TimeoutError as error:
+        raise Exception("sdvstate-curl pod taking took long to create, tests failed...") from error
+
+
+def remove_curl_pod(pod):
+    """
+    Deletes curl pod ``pod``, together with its Job if it has one
+    """
+    job = (pod.metadata.labels or {}).get('job-name')
+    if job:
+        kube_batch_api().delete_namespaced_job(name=job, namespace='default',
+                                               propagation_policy='Background')
+    else:
+        kube_api().delete_namespaced_pod(name=pod.metadata.name,
+                                         namespace='default', body={})
+
+
+def release_kube_curl_pod():
+    """
+    Called at the end of a run, deletes curl pod if ``curl_pod_ttl`` is 0,
+    otherwise keeps it warm for the next run
+    """
+    with _CURL_POD_LOCK:
+        pod, _CURL_POD['pod'] = _CURL_POD['pod'], None
+    if not settings.getValue('curl_pod_ttl'):
+        delete_kube_curl_pod()
+    elif pod is not None:
+        touch_kube_curl_pod(pod)
+
+
+def delete_kube_curl_pod():
+    """
+    Cleans curl utility pod
+    """
+    with _CURL_POD_LOCK:
+        _CURL_POD['pod'] = None
+    kube_batch_api().delete_collection_namespaced_job('default', label_selector=CURL_POD_LABEL,
+                                                      propagation_policy='Background')
+    api = kube_api()
+    api.delete_collection_namespaced_pod('default', label_selector=CURL_POD_LABEL)
+
+
+
+def wait_for_pod(name, namespace, predicate, timeout=None):
+    """
+    Waits until ``predicate`` holds for pod, watching it instead of polling
+
+    :param name: name of pod
+    :param namespace: namespace of pod
+    :param predicate: function(pod) returning True when done waiting
+    :param timeout: seconds to wait, defaults to ``pod_wait_timeout``
+    :return: pod object
+    :raises TimeoutError: if ``predicate`` does not hold within ``timeout``
+    """
+    api = kube_api()
+    if timeout is None:
+        timeout = settings.getValue('pod_wait_timeout')
+    deadline = time.monotonic() + timeout
+
+    pod = api.read_namespaced_pod(name=name, namespace=namespace)
+    version = pod.metadata.resource_version
+    while not predicate(pod):
+        remaining = int(deadline - time.monotonic())
+        if remaining <= 0:
+            raise TimeoutError(f'pod {namespace}/{name} not ready after {timeout}s')
+
+        pod_watch = watch.Watch()
+        for event in pod_watch.stream(api.list_namespaced_pod, namespace,
+                                      field_selector=f'metadata.name={name}',
+                                      resource_version=version,
+                                      timeout_seconds=remaining):
+            if event['type'] == 'ERROR':
+                # resourceVersion expired, read pod again
+                pod = api.read_namespaced_pod(name=name, namespace=namespace)
+                version = pod.metadata.resource_version
+                pod_watch.stop()
+                break
+            if event['type'] == 'DELETED':
+                pod_watch.stop()
+                raise RuntimeError(f'pod {namespace}/{name} deleted while waiting')
+            pod = event['object']
+            version = pod.metadata.resource_version
+            if predicate(pod):
+                pod_watch.stop()
+                break
+
+    return pod
+
+
+def wait_for_pod_phase(name, namespace, phases=('Running',), timeout=None):
+    """
+    Waits until pod reaches one of ``phases``
+
+    :return: pod object
+    :raises TimeoutError: if pod is not in ``phases`` within ``timeout``
+    :raises RuntimeError: if pod failed or was deleted instead
+    """
+    def in_phase(pod):
+        if pod.status.phase == 'Failed' and 'Failed' not in phases:
+            raise RuntimeError(f'pod {namespace}/{name} failed')
+        return pod.status.phase in phases
+
+    return wait_for_pod(name, namespace, in_phase, timeout)
+
+
+def wait_for_job_pod(job, namespace, timeout=None):
+    """
+    Waits until the pod of Job ``job`` is created and running
+
+    :return: pod object
+    :raises TimeoutError: if pod is not running within ``timeout``
+    :raises RuntimeError: if pod failed or was deleted instead
+    """
+    api = kube_api()
+    if timeout is None:
+        timeout = settings.getValue('pod_wait_timeout')
+    deadline = time.monotonic() + timeout
+    selector = f'job-name={job}'
+
+    pod = None
+    while pod is None:
+        pods = api.list_namespaced_pod(namespace, label_selector=selector)
+        if pods.items:
+            pod = pods.items[0]
+            break
+        remaining = int(deadline - time.monotonic())
+        if remaining <= 0:
+            raise TimeoutError(f'pod of job {namespace}/{job} not created after {timeout}s')
+
+        pod_watch = watch.Watch()
+        for event in pod_watch.stream(api.list_namespaced_pod, namespace,
+                                      label_selector=selector,
+                                      resource_version=pods.metadata.resource_version,
+                                      timeout_seconds=remaining):
+            # on ERROR, e.g. an expired resourceVersion, list pods again
+            if event['type'] == 'ADDED':
+                pod = event['object']
+            pod_watch.stop()
+            break
+
+    return wait_for_pod_phase(pod.metadata.name, namespace,
+                              timeout=max(int(deadline - time.monotonic()), 1))
+
+
+def pod_is_scheduled(pod):
+    """
+    True if pod is admitted and bound to a node
+    """
+    for condition in pod.status.conditions or []:
+        if condition.type == 'PodScheduled' and condition.status == 'True':
+            return True
+    return False
+
+
+def run_probe_pods(probes, namespace='default'):
+    """
+    Runs a batch of short lived probe pods
+
+    All pods are submitted at once and waited for concurrently, each
+    probe's ``on_ready`` runs as soon as its own pod is ready. Finally all
+    probe pods are deleted with a single call.
+
+    :param probes: list of (manifest, ready, on_ready) tuples, where
+        ``ready`` is a predicate as for ``wait_for_pod`` and ``on_ready``
+        a function(pod) returning the outcome of the probe
+    :param namespace: namespace to create probe pods in
+    :return: list of outcomes in order of ``probes``, an outcome is either
+        the return value of ``on_ready`` or the exception raised on the way
+    """
+    api = kube_api()
+    batch = kube_recorder.value('probe_batch', lambda: uuid.uuid4().hex[:12])
+    outcomes = [None] * len(probes)
+    created = []
+
+    for index, (manifest, _, _) in enumerate(probes):
+        manifest = copy.deepcopy(manifest)
+        manifest['metadata'].setdefault('labels', {})['sdvstate-probe'] = batch
+        try:
+            created.append((index, api.create_namespaced_pod(body=manifest,
+                                                             namespace=namespace)))
+        except Exception as error:     # pylint: disable=broad-except
+            outcomes[index] = error
+
+    def probe(item):
+        index, pod = item
+        _, ready, on_ready = probes[index]
+        try:
+            pod = wait_for_pod(pod.metadata.name, namespace, ready)
+            return on_ready(pod)
+        except Exception as error:     # pylint: disable=broad-except
+            return error
+
+    try:
+        if created:
+            for (index, _), outcome in zip(created, fan_out(probe, created, len(created))):
+                outcomes[index] = outcome
+    finally:
+        if created:
+            api.delete_collection_namespaced_pod(namespace,
+                                                 label_selector=f'sdvstate-probe={batch}')
+
+    return outcomes
+
+
+def wait_for_daemonset_rollout(name, namespace, timeout=None):
+    """
+    Waits until all pods of DaemonSet are scheduled, updated and ready
+
+    :param name: name of DaemonSet
+    :param namespace: namespace of DaemonSet
+    :param timeout: seconds to wait, defaults to ``pod_wait_timeout``
+    :return: DaemonSet object
+    :raises TimeoutError: if rollout does not finish within ``timeout``
+    """
+    api = kube_apps_api()
+    if timeout is None:
+        timeout = settings.getValue('pod_wait_timeout')
+    deadline = time.monotonic() + timeout
+
+    def rolled_out(daemonset):
+        status = daemonset.status
+        return (status.observed_generation is not None
+                and status.observed_generation >= daemonset.metadata.generation
+                and status.desired_number_scheduled is not None
+                and status.desired_number_scheduled == status.number_ready
+                and status.desired_number_scheduled == (status.updated_number_scheduled or 0))
+
+    daemonset = api.read_namespaced_daemon_set(name=name, namespace=namespace)
+    while not rolled_out(daemonset):
+        remaining = int(deadline - time.monotonic())
+        if remaining <= 0:
+            raise TimeoutError(f'daemonset {namespace}/{name} not rolled out after {timeout}s')
+
+        ds_watch = watch.Watch()
+        for event in ds_watch.stream(api.list_namespaced_daemon_set, namespace,
+                                     field_selector=f'metadata.name={name}',
+                                     resource_version=daemonset.metadata.resource_version,
+                                     timeout_seconds=remaining):
+            if event['type'] == 'ERROR':
+                daemonset = api.read_namespaced_daemon_set(name=name, namespace=namespace)
+                ds_watch.stop()
+                break
+            if event['type'] == 'DELETED':
+                ds_watch.stop()
+                raise RuntimeError(f'daemonset {namespace}/{name} deleted while waiting')
+            daemonset = event['object']
+            if rolled_out(daemonset):
+                ds_watch.stop()
+                break
+
+    return daemonset
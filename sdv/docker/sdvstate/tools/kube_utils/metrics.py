@@ -0,0 +1,202 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Check metrics
+
+Counts API calls, exec calls, bytes transferred, retries and result
+stores made while a check runs. The check being measured is tracked in a context variable,
+so counts are attributed correctly while checks run concurrently, and
+``bind`` carries it over to worker threads started by a check.
+"""
+
+import contextvars
+import functools
+import resource
+import threading
+import time
+
+from .api_stats import api_stats, request_kind
+
+
+_CURRENT = contextvars.ContextVar('check_metrics', default=None)
+
+
+class CheckMetrics():
+    """
+    Check Metrics
+    Counters of one check run
+    """
+
+    def __init__(self, name):
+        """
+        Initialisation function
+        """
+        self.name = name
+        self.start = None
+        self.end = None
+        self._lock = threading.Lock()
+        # growth of peak RSS of the process while the check ran, in KiB,
+        # only attributable to the check while checks run one at a time
+        self.rss_growth = None
+        # verdict of a previous run was reused instead of running the check
+        self.reused = False
+        self._counters = {'api_calls': 0,
+                          'exec_calls': 0,
+                          'bytes': 0,
+                          'retries': 0,
+                          'store_calls': 0,
+                          'store_seconds': 0.0}
+
+    def add(self, **counts):
+        """
+        Adds ``counts`` to counters, e.g. ``add(api_calls=1, bytes=512)``
+        """
+        with self._lock:
+            for key, value in counts.items():
+                self._counters[key] += value
+
+    @property
+    def duration(self):
+        """
+        Seconds the check took
+        """
+        if self.start is None or self.end is None:
+            return None
+        return self.end - self.start
+
+    def as_dict(self):
+        """
+        Returns metrics as dict
+        """
+        with self._lock:
+            metrics = dict(self._counters)
+        metrics['start'] = self.start
+        metrics['end'] = self.end
+        metrics['duration'] = self.duration
+        metrics['rss_growth'] = self.rss_growth
+        metrics['reused'] = self.reused
+        return metrics
+
+
+def measure(name, func, *args, **kwargs):
+    """
+    Calls ``func`` and records metrics of everything it does
+
+    :return: (return value of func, CheckMetrics)
+    """
+    metrics = CheckMetrics(name)
+    token = _CURRENT.set(metrics)
+    start_rss = peak_rss()
+    metrics.start = time.monotonic()
+    try:
+        return func(*args, **kwargs), metrics
+    finally:
+        metrics.end = time.monotonic()
+        metrics.rss_growth = peak_rss() - start_rss
+        _CURRENT.reset(token)
+
+
+def peak_rss():
+    """
+    Returns peak resident set size of the process so far, in KiB
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def current():
+    """
+    Returns CheckMetrics of the check running in this context, or None
+    """
+    return _CURRENT.get()
+
+
+def count(**counts):
+    """
+    Adds ``counts`` to metrics of the running check, if any
+    """
+    metrics = _CURRENT.get()
+    if metrics is not None:
+        metrics.add(**counts)
+
+
+def bind(func):
+    """
+    Returns ``func`` wrapped to record metrics to the check running now,
+    for use with worker threads
+    """
+    metrics = _CURRENT.get()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _CURRENT.set(metrics)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _CURRENT.reset(token)
+    return wrapper
+
+
+def instrument(api_client):
+    """
+    Counts requests made through ``api_client`` to the running check and
+    accounts them by verb and resource in ``api_stats``
+
+    Wraps the ``request`` method of this ApiClient instance.
+    """
+    request = api_client.request
+    if getattr(request, 'instrumented', False):
+        return api_client
+
+    @functools.wraps(request)
+    def counted_request(method, url, *args, **kwargs):
+        verb, resource_name = request_kind(method, url, kwargs.get('query_params'))
+        start = time.monotonic()
+        try:
+            response = request(method, url, *args, **kwargs)
+        except Exception:
+            api_stats.record(verb, resource_name, time.monotonic() - start, 0, failed=True)
+            count(api_calls=1)
+            raise
+        size = response_size(response)
+        api_stats.record(verb, resource_name, time.monotonic() - start, size)
+        count(api_calls=1, bytes=size, retries=response_retries(response))
+        return response
+
+    counted_request.instrumented = True
+    api_client.request = counted_request
+    return api_client
+
+
+def response_size(response):
+    """
+    Returns size of body of ``response`` in bytes
+    """
+    if hasattr(response, 'stream'):
+        # urllib3 response, body is streamed by the caller, don't read it here
+        return int(response.headers.get('Content-Length') or 0)
+    return len(getattr(response, 'data', None) or b'')
+
+
+def response_retries(response):
+    """
+    Returns number of retries urllib3 made for ``response``
+    """
+    raw = getattr(response, 'urllib3_response', response)
+    retries = getattr(raw, 'retries', None)
+    if retries is None:
+        return 0
+    return len(retries.history)
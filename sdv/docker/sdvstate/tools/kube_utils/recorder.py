@@ -0,0 +1,442 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Record and replay of cluster access
+
+Records every API response and exec output of a run into a gzip
+compressed JSON lines archive, and serves a later run from that archive
+instead of a cluster. Checks can then be developed and benchmarked
+offline, at memory speed and with reproducible inputs.
+
+An archive entry is one of
+  {"kind": "http", "key": [method, path, query], "status", "reason",
+   "headers", "data" or "data_b64"} or the same with "error" for
+   requests which raised,
+  {"kind": "exec", "key": [namespace, pod, command], "returncode",
+   "stdout", "stderr"},
+  {"kind": "value", "key": name, "value"} for random values a run
+   depends on, e.g. names of probe pods.
+
+Responses to the same key are replayed in the order they were recorded,
+the last one is repeated once they run out.
+"""
+
+import base64
+import functools
+import gzip
+import json
+import logging
+import threading
+from collections import defaultdict
+from urllib.parse import urlparse
+
+from kubernetes.client.rest import ApiException
+
+from .exec_session import ExecResult
+
+
+# query parameters which vary between runs without changing the response
+VOLATILE_PARAMS = ('timeoutSeconds',)
+
+
+class KubeRecorder():
+    """
+    Kube Recorder
+    Records cluster access of a run, or replays it from an archive
+    """
+
+    def __init__(self):
+        """
+        Initialisation function
+        """
+        self._logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._record_file = None
+        self._replay_file = None
+        self._entries = defaultdict(list)
+        self._cursors = defaultdict(int)
+
+    @property
+    def recording(self):
+        """
+        True if cluster access is being recorded
+        """
+        return self._record_file is not None
+
+    @property
+    def replaying(self):
+        """
+        True if cluster access is served from an archive
+        """
+        return self._replay_file is not None
+
+    def start(self, record_file=None, replay_file=None):
+        """
+        Starts recording to ``record_file`` or replaying from
+        ``replay_file``, discarding entries of a previous run
+
+        :param record_file: archive to write on ``save``
+        :param replay_file: archive to serve requests from
+        """
+        if record_file and replay_file:
+            raise ValueError('cannot record and replay at the same time')
+
+        entries = defaultdict(list)
+        if replay_file:
+            with gzip.open(replay_file, 'rt', encoding='utf-8') as archive:
+                for line in archive:
+                    entry = json.loads(line)
+                    entries[entry_key(entry['kind'], entry['key'])].append(entry)
+
+        with self._lock:
+            self._record_file = record_file or None
+            self._replay_file = replay_file or None
+            self._entries = entries
+            self._cursors = defaultdict(int)
+
+    def save(self):
+        """
+        Writes recorded entries to the archive
+        """
+        if not self.recording:
+            return
+        with self._lock:
+            entries = [entry for values in self._entries.values() for entry in values]
+        with gzip.open(self._record_file, 'wt', encoding='utf-8') as archive:
+            for entry in entries:
+                archive.write(json.dumps(entry) + '\n')
+        self._logger.info(f'recorded {len(entries)} responses to {self._record_file}')
+
+    def install(self, api_client):
+        """
+        Records or replays requests made through ``api_client``
+
+        Wraps the ``request`` method of this ApiClient instance, it must be
+        installed before any other wrapper so those still see every request.
+        """
+        request = api_client.request
+
+        @functools.wraps(request)
+        def recorded_request(method, url, *args, query_params=None, **kwargs):
+            key = http_key(method, url, query_params)
+            preload = kwargs.get('_preload_content', True)
+            if self.replaying:
+                return replay_response(self._next('http', key), preload)
+            if not self.recording:
+                return request(method, url, *args, query_params=query_params, **kwargs)
+
+            entry = self._reserve('http', key)
+            try:
+                response = request(method, url, *args, query_params=query_params, **kwargs)
+            except ApiException as error:
+                body = error.body
+                if isinstance(body, bytes):
+                    body = body.decode('utf-8', errors='replace')
+                entry['error'] = {'status': error.status, 'reason': error.reason,
+                                  'headers': dict(error.headers or {}), 'body': body}
+                raise
+            except Exception as error:
+                # connection errors are replayed as ApiException without status
+                entry['error'] = {'status': 0, 'reason': str(error),
+                                  'headers': {}, 'body': None}
+                raise
+            entry.update(status=response.status, reason=response.reason,
+                         headers=response_headers(response))
+            if preload:
+                set_data(entry, response.data)
+                return response
+            return TeeResponse(response, entry)
+
+        api_client.request = recorded_request
+        return api_client
+
+    def exec(self, pod, cmd, execute):
+        """
+        Returns ExecResult of ``cmd`` inside ``pod``, from the archive when
+        replaying, otherwise of ``execute()``
+        """
+        key = [pod.metadata.namespace, pod.metadata.name, list(cmd)]
+        if self.replaying:
+            entry = self._next('exec', key)
+            if entry is None:
+                return ExecResult(None, '', f'not in replay archive: {cmd}')
+            return ExecResult(entry['returncode'], entry['stdout'], entry['stderr'])
+
+        result = execute()
+        if self.recording:
+            self._reserve('exec', key).update(returncode=result.returncode,
+                                              stdout=result.stdout,
+                                              stderr=result.stderr)
+        return result
+
+    def value(self, name, make):
+        """
+        Returns random value ``name`` made by ``make()``, from the archive
+        when replaying, so requests depending on it match the recording
+        """
+        if self.replaying:
+            entry = self._next('value', name)
+            if entry is not None:
+                return entry['value']
+        value = make()
+        if self.recording:
+            self._reserve('value', name)['value'] = value
+        return value
+
+    def _reserve(self, kind, key):
+        """
+        Appends a new entry for ``key``, filled in by the caller
+        """
+        entry = {'kind': kind, 'key': key}
+        with self._lock:
+            self._entries[entry_key(kind, key)].append(entry)
+        return entry
+
+    def _next(self, kind, key):
+        """
+        Returns next recorded entry for ``key``, or None if there is none
+        """
+        lookup = entry_key(kind, key)
+        with self._lock:
+            entries = self._entries.get(lookup)
+            if not entries:
+                self._logger.warning(f'not in replay archive: {kind} {key}')
+                return None
+            cursor = self._cursors[lookup]
+            self._cursors[lookup] = cursor + 1
+            return entries[min(cursor, len(entries) - 1)]
+
+
+class TeeResponse():
+    """
+    Tee Response
+    Streamed urllib3 response which copies the body read by the caller
+    into a recorded entry
+    """
+
+    def __init__(self, response, entry):
+        """
+        Initialisation function
+        """
+        self._response = response
+        self._entry = entry
+        self._chunks = []
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    @property
+    def data(self):
+        """
+        Whole body of response
+        """
+        data = self._response.data
+        self._chunks.append(data)
+        self._finish()
+        return data
+
+    def read(self, *args, **kwargs):
+        """
+        Reads from body of response
+        """
+        data = self._response.read(*args, **kwargs)
+        self._chunks.append(data)
+        return data
+
+    def stream(self, *args, **kwargs):
+        """
+        Yields chunks of body of response
+        """
+        for chunk in self._response.stream(*args, **kwargs):
+            self._chunks.append(chunk)
+            yield chunk
+        self._finish()
+
+    def read_chunked(self, *args, **kwargs):
+        """
+        Yields HTTP chunks of body of response, used by watches
+        """
+        for chunk in self._response.read_chunked(*args, **kwargs):
+            self._chunks.append(chunk)
+            yield chunk
+        self._finish()
+
+    def release_conn(self):
+        """
+        Records body read so far and releases connection
+        """
+        self._finish()
+        self._response.release_conn()
+
+    def close(self):
+        """
+        Records body read so far and closes response
+        """
+        self._finish()
+        self._response.close()
+
+    def _finish(self):
+        """
+        Records body read so far
+        """
+        set_data(self._entry, b''.join(self._chunks))
+
+
+class ReplayResponse():
+    """
+    Replay Response
+    Response served from the archive in place of a RESTResponse
+    """
+
+    def __init__(self, status, reason, headers, data):
+        """
+        Initialisation function
+        """
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.data = data
+
+    def getheaders(self):
+        """
+        Returns headers of response
+        """
+        return self.headers
+
+    def getheader(self, name, default=None):
+        """
+        Returns header ``name`` of response
+        """
+        return self.headers.get(name, default)
+
+
+class StreamedReplayResponse(ReplayResponse):
+    """
+    Streamed Replay Response
+    Response served from the archive in place of a streamed urllib3
+    response
+    """
+
+    def __init__(self, status, reason, headers, data):
+        """
+        Initialisation function
+        """
+        super(StreamedReplayResponse, self).__init__(status, reason, headers, data)
+        self._offset = 0
+
+    def read(self, amt=None, **_):
+        """
+        Reads from body of response
+        """
+        end = len(self.data) if amt is None else self._offset + amt
+        data = self.data[self._offset:end]
+        self._offset += len(data)
+        return data
+
+    def stream(self, amt=2 ** 16, **_):
+        """
+        Yields chunks of body of response
+        """
+        while True:
+            data = self.read(amt)
+            if not data:
+                return
+            yield data
+
+    def read_chunked(self, amt=None, **_):
+        """
+        Yields body of response as chunks
+        """
+        return self.stream(amt or 2 ** 16)
+
+    def release_conn(self):
+        """
+        Nothing to release
+        """
+
+    def close(self):
+        """
+        Nothing to close
+        """
+
+
+def entry_key(kind, key):
+    """
+    Returns hashable lookup key of an entry
+    """
+    return kind, json.dumps(key, sort_keys=True)
+
+
+def http_key(method, url, query_params):
+    """
+    Returns archive key of a request, ignoring ``VOLATILE_PARAMS`` and the
+    API server address
+    """
+    query = sorted([name, str(value)] for name, value in (query_params or [])
+                   if name not in VOLATILE_PARAMS)
+    return [method, urlparse(url).path, query]
+
+
+def response_headers(response):
+    """
+    Returns headers of a RESTResponse or urllib3 response as dict
+    """
+    raw = getattr(response, 'urllib3_response', response)
+    return dict(raw.headers)
+
+
+def set_data(entry, data):
+    """
+    Stores body ``data`` in ``entry``, as text if it is valid UTF-8
+    """
+    if isinstance(data, str):
+        entry['data'] = data
+        return
+    try:
+        entry['data'] = data.decode('utf-8')
+    except UnicodeDecodeError:
+        entry['data_b64'] = base64.b64encode(data).decode('ascii')
+
+
+def replay_response(entry, preload):
+    """
+    Returns response of a recorded entry, or raises its recorded error
+
+    :param preload: return body as text like a preloaded RESTResponse,
+        instead of bytes of a streamed response
+    """
+    if entry is None:
+        raise ApiException(status=404, reason='Not in replay archive')
+    if 'error' in entry:
+        error = ApiException(status=entry['error']['status'],
+                             reason=entry['error']['reason'])
+        error.headers = entry['error']['headers']
+        error.body = entry['error']['body']
+        raise error
+
+    if 'data_b64' in entry:
+        data = base64.b64decode(entry['data_b64'])
+    else:
+        data = entry.get('data', '').encode('utf-8')
+    if preload:
+        return ReplayResponse(entry['status'], entry['reason'], entry['headers'],
+                              data.decode('utf-8', errors='replace'))
+    return StreamedReplayResponse(entry['status'], entry['reason'], entry['headers'], data)
+
+
+# pylint: disable=invalid-name
+kube_recorder = KubeRecorder()
@@ -0,0 +1,69 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Remote artifact cache
+
+Memoizes parsed output of commands run inside pods (config files, ovsdb
+maps, json, ..) keyed by pod uid and command. An entry is dropped as soon
+as the pod's resourceVersion changes.
+"""
+
+from .keyed_cache import KeyedCache
+
+
+class RemoteCache():
+    """
+    Remote Cache
+    Keyed cache of parsed remote artifacts shared by all checks
+    """
+
+    def __init__(self):
+        """
+        Initialization function
+        """
+        self._cache = KeyedCache('remote cache')
+
+    def reset(self):
+        """
+        Drops all cached entries and counters
+        """
+        self._cache.reset()
+
+    def get(self, pod, cmd, fetch, parser=None):
+        """
+        Returns parsed output of ``cmd`` run inside ``pod``
+
+        :param pod: pod object
+        :param cmd: command as list of args
+        :param fetch: function(pod, cmd) returning raw command output
+        :param parser: function to parse raw output, part of cache key
+        """
+        def fetch_parsed():
+            value = fetch(pod, cmd)
+            return value if parser is None else parser(value)
+
+        return self._cache.get((pod.metadata.uid, tuple(cmd), parser), fetch_parsed,
+                               version=pod.metadata.resource_version)
+
+    def stats(self):
+        """
+        Returns hit/miss counters of the cache
+        """
+        return self._cache.stats()
+
+
+# pylint: disable=invalid-name
+remote_cache = RemoteCache()
@@ -0,0 +1,107 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Cluster snapshot
+
+Per-run cache of cluster objects (pods, nodes and namespaces) shared by
+all checks, so that the same list is fetched from the API server only
+once per run (or once per ``snapshot_ttl`` seconds).
+"""
+
+from tools.conf import settings    # pylint: disable=import-error
+
+from .keyed_cache import KeyedCache
+
+
+class ClusterSnapshot():
+    """
+    Cluster Snapshot
+    Lists pods, nodes and namespaces on demand and serves repeated
+    requests from memory until the entry expires
+    """
+
+    def __init__(self):
+        """
+        Initialization function
+        """
+        self._cache = KeyedCache('snapshot')
+
+    def reset(self):
+        """
+        Drops all cached entries and counters
+        """
+        self._cache.reset()
+
+    def get(self, key, fetch, refresh=False):
+        """
+        Returns cached value of ``key``, calls ``fetch`` on a miss
+
+        Concurrent requests for the same ``key`` wait for a single fetch.
+        """
+        return self._cache.get(key, fetch, ttl=settings.getValue('snapshot_ttl'),
+                               refresh=refresh)
+
+    def namespaced_pods(self, api, namespace, refresh=False):
+        """
+        Returns list of pods in ``namespace``
+        """
+        return self.get(('pods', namespace),
+                        lambda: api.list_namespaced_pod(namespace).items,
+                        refresh)
+
+    def all_pods(self, api, refresh=False):
+        """
+        Returns list of pods in all namespaces
+        """
+        return self.get(('pods', None),
+                        lambda: api.list_pod_for_all_namespaces().items,
+                        refresh)
+
+    def labeled_pods(self, api, labels, refresh=False):
+        """
+        Returns list of pods in all namespaces matching ``labels``
+        """
+        return self.get(('pods', None, labels),
+                        lambda: api.list_pod_for_all_namespaces(label_selector=labels).items,
+                        refresh)
+
+    def nodes(self, api, refresh=False):
+        """
+        Returns list of nodes
+        """
+        return self.get(('nodes',),
+                        lambda: api.list_node().items,
+                        refresh)
+
+    def namespaces(self, api, refresh=False):
+        """
+        Returns list of namespaces
+        """
+        return self.get(('namespaces',),
+                        lambda: api.list_namespace().items,
+                        refresh)
+
+    def stats(self):
+        """
+        Returns hit/miss counters of the snapshot
+        """
+        stats = self._cache.stats()
+        stats['api_calls_saved'] = stats['hits']
+        return stats
+
+
+# pylint: disable=invalid-name
+cluster_snapshot = ClusterSnapshot()
@@ -19,6 +19,8 @@ Result Manager Package
 """
 from .result_api import result_api
 from .rfile import rfile
+from .record import Record
 
 from .storage.storage_api import StorageApi
 from .storage.local.local import Local
+from .storage.jsonl.jsonl import JsonLines
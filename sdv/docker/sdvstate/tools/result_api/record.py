@@ -0,0 +1,76 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""Record is a compact, slots based result entry for Result_api and
+storage_api
+"""
+
+# pylint: disable=invalid-name
+
+
+class Record():
+    """
+    Base of compact result records
+
+    Subclasses name their fields in ``__slots__``, which keeps records far
+    smaller than dicts when a result holds one per pod. Fields can be read
+    and written like dict keys. Fields listed in ``_optional`` are left
+    out of ``as_dict`` while they are None. Storages convert records with
+    ``as_dict`` when they save a result.
+    """
+
+    __slots__ = ()
+    _optional = ()
+
+    def __init__(self, **fields):
+        """
+        Initialisation function, unset fields are None
+        """
+        for name in self.__slots__:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f'{type(self).__name__} has no fields {list(fields)}')
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def get(self, key, default=None):
+        """
+        Returns value of field ``key`` or ``default`` if not set
+        """
+        if key in self:
+            return getattr(self, key)
+        return default
+
+    def as_dict(self):
+        """
+        Returns record as dict
+        """
+        return {name: getattr(self, name) for name in self.__slots__
+                if name not in self._optional or getattr(self, name) is not None}
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.as_dict()})'
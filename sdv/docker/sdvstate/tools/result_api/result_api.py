@@ -18,9 +18,17 @@ Result API
 Main entry point to use results manager
 """
 
+import atexit
 import logging
+import queue
+import threading
+from tools.conf import settings   # pylint: disable=import-error
 from .storage.storage_api import StorageApi
 
+
+_STOP = object()
+
+
 class ResultApi():
     """
     Result API
@@ -34,40 +42,181 @@ class ResultApi():
         """
         self._logger = logging.getLogger(__name__)
         self._storage_handles = []
+        self._workers = {}
+        self._errors = []
+        self._lock = threading.Lock()
+        # synchronous storages are not safe for concurrent writes
+        self._sync_lock = threading.Lock()
 
     def register_storage(self, storage_api):
         """
         Registers ``storage_api`` as an active storage option to use.
+
+        With ``results_async`` enabled the storage gets its own writer
+        thread fed by a queue of ``results_queue_size`` records.
         """
         self._logger.debug("Loading new Storage API...")
         if not isinstance(storage_api, StorageApi):
             raise TypeError("incorrect storage type, Required StorageAPI obj")
 
         storage_api.load_settings()
-        self._storage_handles.append(storage_api)
+        with self._lock:
+            if _setting('results_async', False):
+                self._workers[storage_api] = StorageWorker(storage_api,
+                                                           _setting('results_queue_size', 64),
+                                                           self._on_error)
+            self._storage_handles.append(storage_api)
         self._logger.info(f'{storage_api.name} api registered')
 
     def unregister_storage(self, storage_api):
         """
-        Removes registered ``storage_api`` if exists
+        Removes registered ``storage_api`` if exists, after writing all
+        records queued for it
         """
-        while storage_api in self._storage_handles:
-            self._storage_handles.remove(storage_api)
+        with self._lock:
+            while storage_api in self._storage_handles:
+                self._storage_handles.remove(storage_api)
+            worker = self._workers.pop(storage_api, None)
+        if worker is not None:
+            worker.stop()
 
     def unregister_all(self):
         """
         Removes all registered storage endpoints
         """
-        for storage_api in self._storage_handles:
+        for storage_api in list(self._storage_handles):
             self.unregister_storage(storage_api)
 
     def store(self, data):
         """
         Calls all active storage_api and stores ``data`` in all of them
+
+        Safe to call from concurrently running checks. Asynchronous
+        storages only queue ``data``, which must not be modified afterwards.
+        The call blocks only while a storage's queue is full.
+        """
+        with self._lock:
+            targets = [(api, self._workers.get(api)) for api in self._storage_handles]
+
+        # a full queue is drained by a worker which may report errors, so
+        # queueing must not hold ``_lock``
+        for api, worker in targets:
+            if worker is None:
+                with self._sync_lock:
+                    api.store(data)
+            else:
+                worker.put(data)
+
+    def flush(self):
+        """
+        Waits until all queued records are written
+        """
+        for worker in list(self._workers.values()):
+            worker.flush()
+
+    def close(self):
+        """
+        Writes all queued records, closes and unregisters all storages
+
+        :return: list of (storage name, error) for records which failed
+            to be stored asynchronously or storages which failed to close
+            since the last call to ``close``
+        """
+        for storage_api in list(self._storage_handles):
+            self.unregister_storage(storage_api)
+            try:
+                storage_api.close()
+            except Exception as error:  # pylint: disable=broad-except
+                self._on_error(storage_api, error)
+
+        with self._lock:
+            errors, self._errors = self._errors, []
+        return errors
+
+    def errors(self):
+        """
+        Returns list of (storage name, error) collected so far
+        """
+        with self._lock:
+            return list(self._errors)
+
+    def _on_error(self, storage_api, error):
+        """
+        Records an error of an asynchronous storage
+        """
+        self._logger.error(f'{storage_api.name}: failed to store record: {error}')
+        with self._lock:
+            self._errors.append((storage_api.name, error))
+
+
+class StorageWorker():
+    """
+    Storage Worker
+    Writes records queued for one storage on a background thread
+    """
+
+    def __init__(self, storage_api, queue_size, on_error):
+        """
+        Initialization function, starts writer thread
+
+        :param storage_api: storage to write records to
+        :param queue_size: records buffered before ``put`` blocks
+        :param on_error: function(storage_api, error) called on failed writes
         """
-        for api in self._storage_handles:
-            api.store(data)
+        self._storage_api = storage_api
+        self._on_error = on_error
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f'result-api-{storage_api.name}')
+        self._thread.start()
+
+    def put(self, data):
+        """
+        Queues ``data``, blocks while queue is full
+        """
+        self._queue.put(data)
+
+    def flush(self):
+        """
+        Waits until queue is empty
+        """
+        self._queue.join()
+
+    def stop(self):
+        """
+        Writes remaining records and stops writer thread
+        """
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        """
+        Writer loop
+        """
+        while True:
+            data = self._queue.get()
+            try:
+                if data is _STOP:
+                    return
+                self._storage_api.store(data)
+            except Exception as error:  # pylint: disable=broad-except
+                self._on_error(self._storage_api, error)
+            finally:
+                self._queue.task_done()
+
+
+def _setting(key, default):
+    """
+    Returns value of setting ``key`` or ``default`` if not set
+    """
+    try:
+        return settings.getValue(key)
+    except AttributeError:
+        return default
 
 
 # pylint: disable=invalid-name
 result_api = ResultApi()
+
+# flush-on-exit, so that queued records are not lost
+atexit.register(result_api.close)
@@ -18,12 +18,24 @@
 """
 
 import logging
+import threading
 
 # pylint: disable=invalid-name
 
+CHUNK_SIZE = 64 * 1024
+
+
 class rfile():
     """
     rfile object to represent files in Result API
+
+    Data can be a str, bytes, an iterable of str/bytes chunks or a file
+    object. Storages read it chunk by chunk with ``iter_chunks`` so large
+    data is never held in memory as a whole. Iterables and non-seekable
+    file objects can be read only once.
+
+    Data can also be a function returning any of the above, which is
+    called only when a storage reads the rfile.
     """
 
     def __init__(self, data):
@@ -31,15 +43,19 @@ class rfile():
         Initialisation function
         """
         self._logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
         self.hold_data(data)
 
     def get_data(self):
         """
         Returns stored data
         """
-        if self._data == '':
+        data = self._data() if callable(self._data) else self._data
+        if not isinstance(data, str):
+            return b''.join(self.iter_chunks(data=data)).decode(errors='replace')
+        if data == '':
             self._logger.warning('Reading from a empty \'rfile\'')
-        return self._data
+        return data
 
 
     def hold_data(self, data):
@@ -50,3 +66,32 @@ class rfile():
             self._logger.warning('Storing an empty \'rfile\'')
             data = ''
         self._data = data
+
+    def iter_chunks(self, size=CHUNK_SIZE, data=None):
+        """
+        Yields stored data as chunks of bytes
+
+        :param size: maximum size of a chunk
+        :param data: already evaluated data to use instead of stored data
+        """
+        if data is None:
+            data = self._data() if callable(self._data) else self._data
+        if isinstance(data, str):
+            data = data.encode()
+
+        if isinstance(data, bytes):
+            for i in range(0, len(data), size):
+                yield data[i:i + size]
+        elif hasattr(data, 'read'):
+            with self._lock:
+                if hasattr(data, 'seekable') and data.seekable():
+                    data.seek(0)
+                while True:
+                    chunk = data.read(size)
+                    if not chunk:
+                        break
+                    yield chunk.encode() if isinstance(chunk, str) else chunk
+        else:
+            with self._lock:
+                for chunk in data:
+                    yield chunk.encode() if isinstance(chunk, str) else chunk
@@ -0,0 +1,162 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+JSON Lines Storage Api
+
+Appends every record as one line to a results file instead of rewriting
+the whole file, so storing a record costs the same however many records
+were stored before.
+"""
+
+import json
+import logging
+import os
+from tools.conf import settings   # pylint: disable=import-error
+
+from ..storage_api import StorageApi
+from ..storage_utils import eval_rfile
+
+
+
+class JsonLines(StorageApi):
+    """
+    JSON Lines Storage API
+    Stores records append-only, one JSON document per line
+    """
+
+    def __init__(self):
+        """
+        Initialization function
+        """
+        super(JsonLines, self).__init__()
+        self.name = 'JSON Lines Storage'
+        self._logger = logging.getLogger(__name__)
+        self._path = ''
+        self._filename = ''
+        self._export = ''
+        self._fsync_every = 1
+        self._fhandle = None
+        self._pending = 0
+
+    def store(self, data):
+        """
+        appends ``data`` to results file, ``data`` should be a dict
+
+        Records are flushed to the OS right away and fsynced to disk every
+        ``results_fsync_every`` records and on close.
+
+        :param data: dict object to store
+        """
+        if not isinstance(data, dict):
+            raise TypeError("incorrect data type to store, dict required")
+
+        line = json.dumps(eval_rfile(data), sort_keys=True, default=str)
+
+        if self._fhandle is None:
+            # kept open across records, closed by close()
+            self._fhandle = open(self._filename, 'a', encoding='utf-8')  # pylint: disable=consider-using-with
+        self._fhandle.write(line + '\n')
+        self._fhandle.flush()
+        self._pending += 1
+
+        if self._pending >= self._fsync_every:
+            self._sync()
+        self._logger.info(f'{self.name}: New record saved')
+
+    def _sync(self):
+        """
+        Forces appended records to disk
+        """
+        os.fsync(self._fhandle.fileno())
+        self._pending = 0
+
+    def close(self):
+        """
+        Syncs and closes results file, then writes compacted JSON export
+        if ``results_export_json`` is set
+        """
+        if self._fhandle is not None:
+            self._sync()
+            self._fhandle.close()
+            self._fhandle = None
+
+        if self._export and os.path.isfile(self._filename):
+            self.export_json(self._export)
+
+    def export_json(self, filename):
+        """
+        Writes all records to ``filename`` as one JSON list, in the same
+        format as Local storage, one record in memory at a time
+        """
+        with open(self._filename, 'r', encoding='utf-8') as records, \
+             open(filename, 'w', encoding='utf-8') as fhandle:
+            fhandle.write('[')
+            separator = '\n'
+            for line in records:
+                if not line.strip():
+                    continue
+                record = json.dumps(json.loads(line), indent=4, sort_keys=True)
+                fhandle.write(separator + record)
+                separator = ',\n'
+            fhandle.write('\n]')
+        self._logger.info(f'{self.name}: Exported records to {filename}')
+
+
+    def load_settings(self):
+        """
+        Load all required settings otherwise set to default
+        Settings to load:
+        * ``result_path`` (default: /tmp/local/)
+        * ``results_jsonl_filename`` (default: results.jsonl)
+        * ``results_fsync_every`` (default: 16)
+        * ``results_export_json`` (default: False), exports to ``results_filename``
+        """
+        try:
+            path = settings.getValue('results_path')
+        except AttributeError:
+            path = '/tmp/local/'
+            settings.setValue('results_path', path)
+
+        try:
+            filename = settings.getValue('results_jsonl_filename')
+        except AttributeError:
+            filename = 'results.jsonl'
+            settings.setValue('results_jsonl_filename', filename)
+
+        try:
+            fsync_every = settings.getValue('results_fsync_every')
+        except AttributeError:
+            fsync_every = 16
+            settings.setValue('results_fsync_every', fsync_every)
+
+        try:
+            export = settings.getValue('results_export_json')
+        except AttributeError:
+            export = False
+            settings.setValue('results_export_json', export)
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        self._path = path
+        self._filename = path + filename
+        self._fsync_every = max(1, int(fsync_every))
+        self._export = ''
+        if export:
+            try:
+                self._export = path + settings.getValue('results_filename')
+            except AttributeError:
+                self._export = path + 'results.json'
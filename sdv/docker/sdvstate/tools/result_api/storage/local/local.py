@@ -19,13 +19,11 @@ Local Storage Api
 
 import logging
 import os
-import random
-import string
 import json
 from tools.conf import settings   # pylint: disable=import-error
 
 from ..storage_api import StorageApi
-from ... import rfile
+from ..storage_utils import eval_rfile
 
 
 
@@ -61,9 +59,7 @@ class Local(StorageApi):
 
         with open(self._filename, 'r') as fhandle:
             records = json.load(fhandle)
-            temp_data = data.copy()
-            eval_rfile(temp_data)
-            records.append(temp_data)
+            records.append(eval_rfile(data))
 
         with open(self._filename, 'w') as fhandle:
             self._logger.info(f'{self.name}: New record saved')
@@ -94,40 +90,3 @@ class Local(StorageApi):
 
         self._path = path
         self._filename = path + filename
-
-
-
-
-
-def eval_rfile(data):
-    """
-    Find all values of a type rfile in data dict/list and evals them into
-    actual file
-    """
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if isinstance(value, rfile):
-                data[key] = rfile_save(value, key)
-            else:
-                eval_rfile(value)
-    if isinstance(data, list):
-        for i, _ in enumerate(data):
-            if isinstance(data[i], rfile):
-                data[i] = rfile_save(data[i])
-            else:
-                eval_rfile(data[i])
-
-
-def rfile_save(rfile_obj, prefix='zz'):
-    """
-    Takes rfile Object and stores it into random file returning filename
-    """
-    letters = string.ascii_lowercase
-    suffix = ''.join(random.choice(letters) for i in range(6))
-    filename = settings.getValue('results_path') + f'{prefix}-{suffix}.txt'
-    if os.path.isfile(filename):
-        return rfile_save(rfile_obj, prefix)
-    else:
-        with open(filename, 'w') as fhandle:
-            fhandle.write(rfile_obj.get_data())
-        return f'{prefix}-{suffix}.txt'
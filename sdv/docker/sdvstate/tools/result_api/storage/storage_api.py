@@ -39,6 +39,11 @@ class StorageApi():
         """
         raise NotImplementedError()
 
+    def close(self):
+        """
+        Finishes pending writes, called once no more data will be stored
+        """
+
     def load_settings(self):
         """
         Load all required settings
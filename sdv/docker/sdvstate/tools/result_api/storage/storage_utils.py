@@ -0,0 +1,113 @@
+# Copyright 2020 University Of Delhi.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Storage utilities
+Helpers shared by storage backends to save rfiles of results
+"""
+
+import gzip
+import hashlib
+import os
+import random
+import string
+import tempfile
+from tools.conf import settings   # pylint: disable=import-error
+
+from ..rfile import rfile
+from ..record import Record
+
+
+def eval_rfile(data):
+    """
+    Returns copy of data dict/list in which all values of a type rfile are
+    evaled into actual files and replaced by their filenames, and records
+    are turned into dicts. ``data`` itself is left untouched.
+    """
+    if isinstance(data, Record):
+        data = data.as_dict()
+    if isinstance(data, dict):
+        return {key: save_rfile(value, key) if isinstance(value, rfile) else eval_rfile(value)
+                for key, value in data.items()}
+    if isinstance(data, list):
+        return [save_rfile(value) if isinstance(value, rfile) else eval_rfile(value)
+                for value in data]
+    return data
+
+
+def save_rfile(rfile_obj, prefix='zz'):
+    """
+    Saves rfile Object with the configured method and returns its filename
+    relative to ``results_path``
+
+    ``results_blob_store`` (default: True) selects content addressed
+    blobs, otherwise a text file with random name is written.
+    """
+    try:
+        blob_store = settings.getValue('results_blob_store')
+    except AttributeError:
+        blob_store = True
+
+    if blob_store:
+        return rfile_save_blob(rfile_obj)
+    return rfile_save(rfile_obj, prefix)
+
+
+def rfile_save(rfile_obj, prefix='zz'):
+    """
+    Takes rfile Object and stores it into random file returning filename
+    """
+    letters = string.ascii_lowercase
+    suffix = ''.join(random.choice(letters) for i in range(6))
+    filename = settings.getValue('results_path') + f'{prefix}-{suffix}.txt'
+    if os.path.isfile(filename):
+        return rfile_save(rfile_obj, prefix)
+    else:
+        with open(filename, 'w', encoding='utf-8') as fhandle:
+            fhandle.write(rfile_obj.get_data())
+        return f'{prefix}-{suffix}.txt'
+
+
+def rfile_save_blob(rfile_obj):
+    """
+    Takes rfile Object and stores it gzip compressed under its sha256
+    digest, returning ``blobs/<digest>.gz``
+
+    Data is streamed through the hash and compressor into a temporary
+    file, identical data is stored only once.
+    """
+    blobs = settings.getValue('results_path') + 'blobs/'
+    os.makedirs(blobs, exist_ok=True)
+
+    digest = hashlib.sha256()
+    fdesc, tmp_name = tempfile.mkstemp(dir=blobs, suffix='.tmp')
+    try:
+        with os.fdopen(fdesc, 'wb') as fhandle, \
+             gzip.GzipFile(fileobj=fhandle, mode='wb', mtime=0) as compressed:
+            for chunk in rfile_obj.iter_chunks():
+                digest.update(chunk)
+                compressed.write(chunk)
+
+        blob = f'blobs/{digest.hexdigest()}.gz'
+        if os.path.isfile(settings.getValue('results_path') + blob):
+            os.remove(tmp_name)
+        else:
+            os.replace(tmp_name, settings.getValue('results_path') + blob)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+    return blob